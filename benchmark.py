@@ -0,0 +1,217 @@
+"""
+Benchmark riproducibili dei percorsi critici di Tabellone e Partita.
+
+Ogni benchmark ha una preparazione (non misurata) e un'operazione misurata, ripetuta
+più volte per ogni dimensione del tabellone: ogni esecuzione ha una preparazione nuova,
+così le operazioni che consumano il loro stato (un click, una partita) si misurano da sole.
+Si riporta il tempo migliore e, da una esecuzione separata sotto tracemalloc, il picco di
+memoria allocata. I risultati si salvano in JSON e si possono confrontare con un file di
+riferimento:
+
+    python benchmark.py --output base.json
+    python benchmark.py --confronta base.json --soglia 0.2
+
+Le dimensioni predefinite arrivano a 1000x1000; i tabelloni più grandi si chiedono
+esplicitamente, es. --dimensioni 2000x2000 (minuti e centinaia di MB per benchmark).
+
+Con --confronta il processo termina con codice 1 se un benchmark peggiora oltre la soglia.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import itertools
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+
+from campo_minato import Partita, Tabellone
+
+DIMENSIONI: List[Tuple[int, int]] = [(9, 9), (30, 16), (100, 100), (500, 500), (1000, 1000)]
+DENSITA: float = 0.15  # frazione di caselle minate nei tabelloni "normali"
+MOSSE_PARTITA_LUNGA: int = 2000
+SEME: int = 12345
+
+# Una preparazione riceve (righe, colonne, compatto) e restituisce l'operazione da misurare
+Preparazione = Callable[[int, int, bool], Callable[[], object]]
+
+
+def _partita(righe: int, colonne: int, compatto: bool, densita: float = DENSITA) -> Partita:
+    """Partita con le mine già piazzate (primo click simulato al centro)."""
+    partita = Partita(colonne, righe, int(righe * colonne * densita), compatto=compatto, seme=SEME)
+    partita._piazza_mine(partita.tabellone.get_idx(righe // 2, colonne // 2))
+    return partita
+
+
+def prepara_costruzione(righe: int, colonne: int, compatto: bool) -> Callable[[], object]:
+    def esegui() -> object:
+        # Costruzione del tabellone con piazzamento delle mine e calcolo delle adiacenze
+        return _partita(righe, colonne, compatto)
+    return esegui
+
+
+def prepara_copia(righe: int, colonne: int, compatto: bool) -> Callable[[], object]:
+    tabellone: Tabellone = _partita(righe, colonne, compatto).tabellone
+    return lambda: Tabellone.copia_tabellone(tabellone)
+
+
+def prepara_str(righe: int, colonne: int, compatto: bool) -> Callable[[], object]:
+    partita = _partita(righe, colonne, compatto)
+    partita.scopriCasella(righe // 2, colonne // 2)
+    return lambda: str(partita.tabellone)
+
+
+def prepara_scoperta(righe: int, colonne: int, compatto: bool) -> Callable[[], object]:
+    # Poche mine: un click scopre una regione che copre quasi tutto il tabellone
+    partita = _partita(righe, colonne, compatto, densita=0.01)
+
+    def esegui() -> object:
+        partita._scopri_ricorsivo(righe // 2, colonne // 2)
+        return partita
+    return esegui
+
+
+def _mosse_partita_lunga(righe: int, colonne: int) -> List[Tuple[int, int]]:
+    # Caselle distinte sparse sul tabellone (passo coprimo con il numero di caselle)
+    celle: int = righe * colonne
+    passo: int = next(p for p in itertools.count(7919) if math.gcd(p, celle) == 1)
+    return [divmod((i * passo) % celle, colonne) for i in range(min(MOSSE_PARTITA_LUNGA, celle))]
+
+
+def prepara_evoluzione(righe: int, colonne: int, compatto: bool) -> Callable[[], object]:
+    mosse: List[Tuple[int, int]] = _mosse_partita_lunga(righe, colonne)
+    partita = _partita(righe, colonne, compatto)
+
+    def esegui() -> object:
+        for r, c in mosse:
+            # segna_casella registra ogni mossa con _aggiorna_evoluzione
+            partita.segna_casella(r, c)
+        return partita
+    return esegui
+
+
+def prepara_annulla_ripeti(righe: int, colonne: int, compatto: bool) -> Callable[[], object]:
+    partita = _partita(righe, colonne, compatto)
+    mosse = _mosse_partita_lunga(righe, colonne)
+    for r, c in mosse:
+        partita.segna_casella(r, c)
+
+    def esegui() -> object:
+        for _ in mosse:
+            partita.muovi_mossa("indietro")
+        for _ in mosse:
+            partita.muovi_mossa("avanti")
+        return partita
+    return esegui
+
+
+BENCHMARK: Dict[str, Preparazione] = {
+    "costruzione": prepara_costruzione,
+    "copia_tabellone": prepara_copia,
+    "str_tabellone": prepara_str,
+    "scopri_regione": prepara_scoperta,
+    "aggiorna_evoluzione": prepara_evoluzione,
+    "annulla_ripeti": prepara_annulla_ripeti,
+}
+
+
+def misura(preparazione: Preparazione, righe: int, colonne: int, compatto: bool,
+           ripetizioni: int) -> Dict[str, float]:
+    """Tempo migliore su `ripetizioni` esecuzioni e picco di memoria di un'esecuzione."""
+    migliore: float = float("inf")
+    for _ in range(ripetizioni):
+        operazione = preparazione(righe, colonne, compatto)
+        inizio: float = time.perf_counter()
+        operazione()
+        migliore = min(migliore, time.perf_counter() - inizio)
+    # tracemalloc rallenta molto: la memoria si misura a parte, su una nuova preparazione
+    operazione = preparazione(righe, colonne, compatto)
+    tracemalloc.start()
+    try:
+        operazione()
+        _, picco = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"secondi": migliore, "picco_memoria": picco}
+
+
+def esegui_tutti(nomi: List[str], dimensioni: List[Tuple[int, int]], compatto: bool,
+                 ripetizioni: int) -> Dict[str, Dict[str, Dict[str, float]]]:
+    risultati: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for nome in nomi:
+        risultati[nome] = {}
+        for righe, colonne in dimensioni:
+            chiave: str = f"{righe}x{colonne}"
+            risultato = misura(BENCHMARK[nome], righe, colonne, compatto, ripetizioni)
+            risultati[nome][chiave] = risultato
+            print(f"{nome:<20} {chiave:>10} {risultato['secondi'] * 1000:>12.3f} ms "
+                  f"{risultato['picco_memoria'] / 1024:>12.0f} KiB", flush=True)
+    return risultati
+
+
+def confronta(risultati: Dict[str, Dict[str, Dict[str, float]]],
+              riferimento: Dict[str, Dict[str, Dict[str, float]]], soglia: float) -> List[str]:
+    """Stampa il rapporto nuovo/riferimento e restituisce i benchmark peggiorati oltre soglia."""
+    peggiorati: List[str] = []
+    for nome, per_dimensione in risultati.items():
+        for chiave, risultato in per_dimensione.items():
+            base: Optional[Dict[str, float]] = riferimento.get(nome, {}).get(chiave)
+            if base is None:
+                continue
+            rapporti: Dict[str, float] = {
+                misura_: risultato[misura_] / base[misura_]
+                for misura_ in ("secondi", "picco_memoria") if base[misura_] > 0
+            }
+            peggiore: float = max(rapporti.values(), default=1.0)
+            segno: str = "PEGGIORATO" if peggiore > 1 + soglia else ""
+            print(f"{nome:<20} {chiave:>10} tempo x{rapporti.get('secondi', 1.0):.2f} "
+                  f"memoria x{rapporti.get('picco_memoria', 1.0):.2f} {segno}")
+            if segno:
+                peggiorati.append(f"{nome}[{chiave}]")
+    return peggiorati
+
+
+def _dimensioni(testo: str) -> List[Tuple[int, int]]:
+    dimensioni: List[Tuple[int, int]] = []
+    for parte in testo.split(","):
+        righe, _, colonne = parte.partition("x")
+        dimensioni.append((int(righe), int(colonne)))
+    return dimensioni
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark di Tabellone e Partita")
+    parser.add_argument("--benchmark", default=",".join(BENCHMARK),
+                        help="elenco separato da virgole fra: " + ", ".join(BENCHMARK))
+    parser.add_argument("--dimensioni", type=_dimensioni, default=DIMENSIONI,
+                        help="es. 9x9,100x100 (righe x colonne)")
+    parser.add_argument("--ripetizioni", type=int, default=3)
+    parser.add_argument("--compatto", action="store_true", help="tabellone a 1 byte per casella")
+    parser.add_argument("--output", help="file JSON in cui salvare i risultati")
+    parser.add_argument("--confronta", help="file JSON di riferimento")
+    parser.add_argument("--soglia", type=float, default=0.10,
+                        help="peggioramento relativo tollerato nel confronto")
+    args = parser.parse_args(argv)
+
+    nomi: List[str] = args.benchmark.split(",")
+    for nome in nomi:
+        if nome not in BENCHMARK:
+            parser.error(f"benchmark sconosciuto: {nome}")
+    risultati = esegui_tutti(nomi, args.dimensioni, args.compatto, args.ripetizioni)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": platform.python_version(), "compatto": args.compatto,
+                       "risultati": risultati}, f, indent=2)
+    if args.confronta:
+        with open(args.confronta) as f:
+            riferimento = json.load(f)["risultati"]
+        peggiorati = confronta(risultati, riferimento, args.soglia)
+        if peggiorati:
+            print("Peggioramenti: " + ", ".join(peggiorati), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,507 @@
+"""
+Tabellone a blocchi per tabelloni enormi, da milioni a miliardi di caselle.
+
+Il tabellone è diviso in blocchi di lato_blocco x lato_blocco caselle, ognuno un
+bytearray nel formato compatto di campo_minato (mina, segnata, scoperta, mine adiacenti
+<< 3). Un blocco esiste in memoria solo dopo il primo accesso: le sue mine si generano
+da (seme, indice del blocco, caselle escluse dal primo click) e le adiacenze sul bordo
+dalle mine dei blocchi vicini, generate allo stesso modo. Il numero di mine di ogni
+blocco si ricava in O(1) da una ripartizione proporzionale fissa, quindi il totale è
+esattamente n_mine senza generare tutto il tabellone.
+
+Restano in memoria al più max_blocchi blocchi (LRU). Un blocco scaricato con caselle
+scoperte o segnate viene scritto (solo i bit di stato) in un file di appoggio e riletto
+al prossimo accesso; gli altri vengono semplicemente rigenerati.
+
+PartitaABlocchi usa questo tabellone dietro l'API di Partita, invariata:
+    partita = PartitaABlocchi(100_000, 100_000, 1_500_000_000, seme=1)
+    partita.scopriCasella(50_000, 50_000)
+    partita.muovi_mossa("indietro")
+"""
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Mapping, MutableSet, Optional, Set, Tuple, Union
+from array import array
+import random
+import shutil
+import sys
+import tempfile
+
+from campo_minato import Partita, PoliticaStoria, Tabellone
+# API interna del formato compatto (vedi campo_minato)
+from campo_minato import (_Delta, _geometria, _chiave_zobrist, _scopri_in_celle, _somma_vicinato, _T,
+                          _MINA, _SEGNATA, _SCOPERTA, _SHIFT_ADIACENTI, _TABELLE_BIT, _TABELLA_TESTO,
+                          _TABELLA_VISIBILE)
+
+# Tabella per bytes.translate che tiene solo lo stato di gioco (ciò che va salvato su file)
+_TABELLA_STATO: bytes = bytes(v & (_SEGNATA | _SCOPERTA) for v in range(256))
+# Liste di mine dei blocchi tenute in memoria per calcolare le adiacenze dei vicini
+_MAX_MINE_BLOCCHI: int = 256
+
+
+class _Blocchi:
+    """Blocchi residenti (LRU), file di appoggio e generatore deterministico delle mine."""
+
+    def __init__(self, righe: int, colonne: int, lato: int, max_blocchi: int,
+                 file_appoggio: Optional[BinaryIO] = None) -> None:
+        if lato < 1 or max_blocchi < 1:
+            raise ValueError("Lato dei blocchi e blocchi residenti devono essere positivi.")
+        self.righe: int = righe
+        self.colonne: int = colonne
+        self.lato: int = lato
+        self.max_blocchi: int = max_blocchi
+        self.blocchi_per_riga: int = -(-colonne // lato)
+        self.blocchi_per_colonna: int = -(-righe // lato)
+        self._residenti: 'OrderedDict[int, bytearray]' = OrderedDict()
+        self._modificati: Set[int] = set()  # residenti cambiati rispetto al file di appoggio
+        self._file: BinaryIO = file_appoggio if file_appoggio is not None else tempfile.TemporaryFile()
+        self._posizioni: Dict[int, int] = {}  # blocco -> posizione dello stato nel file
+        self._libere: List[int] = []  # posizioni nel file non più usate
+        self._fine: int = 0  # prima posizione mai usata nel file
+        self._conteggi: Dict[int, int] = {_SEGNATA: 0, _SCOPERTA: 0}
+        # Generatore delle mine: (seme, caselle escluse, numero di mine), None finché non piazzate
+        self.generatore: Optional[Tuple[int, Tuple[int, ...], int]] = None
+        self._esclusi_per_blocco: Dict[int, List[int]] = {}  # blocco -> posizioni locali escluse
+        self._mine_blocchi: 'OrderedDict[int, array[int]]' = OrderedDict()
+
+    # ——— geometria ———
+
+    def forma(self, k: int) -> Tuple[int, int, int, int]:
+        """(riga, colonna) della prima casella, altezza e larghezza del blocco k."""
+        br, bc = divmod(k, self.blocchi_per_riga)
+        r0: int = br * self.lato
+        c0: int = bc * self.lato
+        return r0, c0, min(self.lato, self.righe - r0), min(self.lato, self.colonne - c0)
+
+    def posizione(self, idx: int) -> Tuple[int, int]:
+        """(blocco, posizione nel blocco) della casella idx."""
+        lato: int = self.lato
+        r, c = divmod(idx, self.colonne)
+        br, lr = divmod(r, lato)
+        bc, lc = divmod(c, lato)
+        return br * self.blocchi_per_riga + bc, lr * min(lato, self.colonne - bc * lato) + lc
+
+    # ——— mine ———
+
+    def imposta_generatore(self, seme: int, esclusi: Iterable[int], n_mine: int) -> None:
+        """Fissa le mine; i blocchi residenti ricevono mine e adiacenze, lo stato resta."""
+        self.generatore = (seme, tuple(sorted(set(esclusi))), n_mine)
+        self._esclusi_per_blocco = {}
+        for idx in self.generatore[1]:
+            k, locale = self.posizione(idx)
+            self._esclusi_per_blocco.setdefault(k, []).append(locale)
+        for locali in self._esclusi_per_blocco.values():
+            locali.sort()
+        self._mine_blocchi = OrderedDict()
+        for k, celle in self._residenti.items():
+            celle[:] = _unisci(self._genera(k), celle.translate(_TABELLA_STATO))
+
+    def _disponibili_prima(self, k: int) -> int:
+        """Caselle non escluse nei blocchi che precedono k (in ordine per righe)."""
+        br, bc = divmod(k, self.blocchi_per_riga)
+        altezza: int = min(self.lato, self.righe - br * self.lato)
+        celle: int = br * self.lato * self.colonne + bc * self.lato * altezza
+        return celle - sum(len(locali) for j, locali in self._esclusi_per_blocco.items() if j < k)
+
+    def mine_blocco(self, k: int) -> 'array[int]':
+        """Indici (globali) delle mine del blocco k, generati dal seme e tenuti in una cache LRU."""
+        mine = self._mine_blocchi.get(k)
+        if mine is not None:
+            self._mine_blocchi.move_to_end(k)
+            return mine
+        mine = array('q')
+        if self.generatore is not None:
+            seme, esclusi, n_mine = self.generatore
+            r0, c0, altezza, larghezza = self.forma(k)
+            esclusi_locali: List[int] = self._esclusi_per_blocco.get(k, [])
+            disponibili: int = altezza * larghezza - len(esclusi_locali)
+            # Ripartizione proporzionale: il blocco riceve le mine che cadono tra le sue
+            # caselle disponibili cumulate, quindi la somma su tutti i blocchi è n_mine
+            totale: int = self.righe * self.colonne - len(esclusi)
+            prima: int = self._disponibili_prima(k)
+            n: int = n_mine * (prima + disponibili) // totale - n_mine * prima // totale
+            rng = random.Random(seme ^ _chiave_zobrist(k, _MINA))
+            for locale in sorted(rng.sample(range(disponibili), n)):
+                for escluso in esclusi_locali:
+                    if escluso > locale:
+                        break
+                    locale += 1
+                r, c = divmod(locale, larghezza)
+                mine.append((r0 + r) * self.colonne + c0 + c)
+        self._mine_blocchi[k] = mine
+        if len(self._mine_blocchi) > _MAX_MINE_BLOCCHI:
+            self._mine_blocchi.popitem(last=False)
+        return mine
+
+    def _genera(self, k: int) -> bytearray:
+        """
+        Mine e adiacenze del blocco k, senza stato di gioco. Le adiacenze si calcolano
+        con _somma_vicinato su una bitmap con un bordo di una casella, riempito con le
+        mine dei blocchi vicini.
+        """
+        r0, c0, altezza, larghezza = self.forma(k)
+        if self.generatore is None:
+            return bytearray(altezza * larghezza)
+        colonne: int = self.colonne
+        ampiezza: int = larghezza + 2
+        bitmap = bytearray((altezza + 2) * ampiezza)
+        br, bc = divmod(k, self.blocchi_per_riga)
+        for vbr in range(max(br - 1, 0), min(br + 2, self.blocchi_per_colonna)):
+            for vbc in range(max(bc - 1, 0), min(bc + 2, self.blocchi_per_riga)):
+                for idx in self.mine_blocco(vbr * self.blocchi_per_riga + vbc):
+                    r, c = divmod(idx, colonne)
+                    r -= r0 - 1
+                    c -= c0 - 1
+                    if 0 <= r < altezza + 2 and 0 <= c < ampiezza:
+                        bitmap[r * ampiezza + c] = 1
+        righe_mine: List[int] = [int.from_bytes(bitmap[r * ampiezza:(r + 1) * ampiezza], 'little')
+                                 for r in range(altezza + 2)]
+        return _somma_vicinato(righe_mine, larghezza)
+
+    # ——— blocchi residenti e file di appoggio ———
+
+    def blocco(self, k: int) -> bytearray:
+        """Il blocco k, caricato (o generato) se non è residente."""
+        celle = self._residenti.get(k)
+        if celle is not None:
+            self._residenti.move_to_end(k)
+            return celle
+        celle = self._genera(k)
+        posizione = self._posizioni.get(k)
+        if posizione is not None:
+            self._file.seek(posizione)
+            celle = _unisci(celle, self._file.read(len(celle)))
+        self._residenti[k] = celle
+        if len(self._residenti) > self.max_blocchi:
+            self._scarica(next(iter(self._residenti)))
+        return celle
+
+    def _scarica(self, k: int) -> None:
+        celle: bytearray = self._residenti.pop(k)
+        if k not in self._modificati:
+            return  # identico alla copia su file (o rigenerabile dal seme)
+        self._modificati.discard(k)
+        stato: bytearray = celle.translate(_TABELLA_STATO)
+        posizione = self._posizioni.get(k)
+        if stato.count(0) == len(stato):
+            # Nessuna casella scoperta o segnata: basta rigenerarlo
+            if posizione is not None:
+                del self._posizioni[k]
+                self._libere.append(posizione)
+            return
+        if posizione is None:
+            if self._libere:
+                posizione = self._libere.pop()
+            else:
+                posizione = self._fine
+                self._fine += self.lato * self.lato
+            self._posizioni[k] = posizione
+        self._file.seek(posizione)
+        self._file.write(stato)
+
+    def scopri_regione(self, idx: int) -> List[int]:
+        """
+        Come Tabellone.scopri_regione in modalità compatta (la visita è la stessa,
+        _scopri_in_celle), ma un blocco alla volta: i vicini oltre il bordo del blocco
+        diventano semi del blocco vicino. Restituisce gli indici delle caselle nuove.
+        """
+        colonne: int = self.colonne
+        nuove: List[int] = []
+        k, locale = self.posizione(idx)
+        semi_per_blocco: Dict[int, List[int]] = {k: [locale]}
+        while semi_per_blocco:
+            k, semi = semi_per_blocco.popitem()
+            r0, c0, altezza, larghezza = self.forma(k)
+
+            def fuori(r: int, c: int) -> None:
+                if 0 <= r0 + r < self.righe and 0 <= c0 + c < colonne:
+                    vk, v_locale = self.posizione((r0 + r) * colonne + c0 + c)
+                    semi_per_blocco.setdefault(vk, []).append(v_locale)
+
+            locali: List[int] = _scopri_in_celle(self.blocco(k), altezza, larghezza, semi, fuori)
+            if locali:
+                origine: int = r0 * colonne + c0  # indice globale della casella locale 0
+                for j in locali:
+                    r, c = divmod(j, larghezza)
+                    nuove.append(origine + r * colonne + c)
+                self._conteggi[_SCOPERTA] += len(locali)
+                self._modificati.add(k)
+        return nuove
+
+    def valore(self, idx: int) -> int:
+        k, locale = self.posizione(idx)
+        return self.blocco(k)[locale]
+
+    def accendi(self, idx: int, bit: int) -> int:
+        """Accende bit nella casella idx e restituisce il valore che aveva prima."""
+        k, locale = self.posizione(idx)
+        celle: bytearray = self.blocco(k)
+        valore: int = celle[locale]
+        if not valore & bit:
+            celle[locale] = valore | bit
+            self._conteggi[bit] += 1
+            self._modificati.add(k)
+        return valore
+
+    def spegni(self, idx: int, bit: int) -> int:
+        """Spegne bit nella casella idx e restituisce il valore che aveva prima."""
+        k, locale = self.posizione(idx)
+        celle: bytearray = self.blocco(k)
+        valore: int = celle[locale]
+        if valore & bit:
+            celle[locale] = valore & ~bit & 0xFF
+            self._conteggi[bit] -= 1
+            self._modificati.add(k)
+        return valore
+
+    def conteggio(self, bit: int) -> int:
+        if bit == _MINA:
+            return self.generatore[2] if self.generatore is not None else 0
+        return self._conteggi[bit]
+
+    def celle_con(self, bit: int) -> Iterator[int]:
+        """Indici delle caselle con bit acceso, blocco per blocco."""
+        if bit == _MINA:
+            for k in range(self.blocchi_per_riga * self.blocchi_per_colonna):
+                yield from self.mine_blocco(k)
+            return
+        # Solo i blocchi residenti o salvati possono avere stato di gioco
+        for k in sorted(set(self._residenti).union(self._posizioni)):
+            r0, c0, _, larghezza = self.forma(k)
+            marcate: bytearray = self.blocco(k).translate(_TABELLE_BIT[bit])
+            locale: int = marcate.find(1)
+            while locale != -1:
+                r, c = divmod(locale, larghezza)
+                yield (r0 + r) * self.colonne + c0 + c
+                locale = marcate.find(1, locale + 1)
+
+    def copia(self) -> '_Blocchi':
+        """Copia indipendente, con un proprio file di appoggio temporaneo."""
+        copia = _Blocchi(self.righe, self.colonne, self.lato, self.max_blocchi)
+        copia.generatore = self.generatore
+        copia._esclusi_per_blocco = self._esclusi_per_blocco
+        copia._mine_blocchi = OrderedDict(self._mine_blocchi)  # le liste non cambiano mai
+        copia._residenti = OrderedDict((k, celle[:]) for k, celle in self._residenti.items())
+        copia._modificati = set(self._modificati)
+        self._file.seek(0)
+        shutil.copyfileobj(self._file, copia._file)
+        copia._posizioni = dict(self._posizioni)
+        copia._libere = list(self._libere)
+        copia._fine = self._fine
+        copia._conteggi = dict(self._conteggi)
+        return copia
+
+    def memoria(self) -> int:
+        """Byte in memoria dei blocchi residenti e delle liste di mine."""
+        return (sum(sys.getsizeof(celle) for celle in self._residenti.values()) +
+                sum(sys.getsizeof(mine) for mine in self._mine_blocchi.values()))
+
+
+def _unisci(celle: bytearray, stato: Union[bytes, bytearray]) -> bytearray:
+    """OR byte per byte, in aritmetica intera (C) invece che cella per cella."""
+    unione: int = int.from_bytes(celle, 'little') | int.from_bytes(stato, 'little')
+    return bytearray(unione.to_bytes(len(celle), 'little'))
+
+
+class _InsiemeBlocchi(MutableSet[int]):
+    """Vista di tipo insieme su un bit delle caselle di un tabellone a blocchi."""
+    __slots__ = ('_blocchi', '_bit', '_celle')
+
+    def __init__(self, blocchi: _Blocchi, bit: int) -> None:
+        self._blocchi: _Blocchi = blocchi
+        self._bit: int = bit
+        self._celle: int = blocchi.righe * blocchi.colonne
+
+    def __contains__(self, idx: object) -> bool:
+        return (isinstance(idx, int) and 0 <= idx < self._celle
+                and bool(self._blocchi.valore(idx) & self._bit))
+
+    def __len__(self) -> int:
+        return self._blocchi.conteggio(self._bit)
+
+    def __iter__(self) -> Iterator[int]:
+        return self._blocchi.celle_con(self._bit)
+
+    def add(self, idx: int) -> None:
+        if self._bit == _MINA:
+            raise TypeError("Le mine di un tabellone a blocchi vengono dal generatore.")
+        self._blocchi.accendi(idx, self._bit)
+
+    def discard(self, idx: int) -> None:
+        if self._bit == _MINA:
+            raise TypeError("Le mine di un tabellone a blocchi vengono dal generatore.")
+        self._blocchi.spegni(idx, self._bit)
+
+    @classmethod
+    def _from_iterable(cls, it: Iterable[_T]) -> Set[_T]:
+        return set(it)
+
+
+class _AdiacenzeBlocchi(Mapping[int, int]):
+    """Vista in sola lettura delle mine adiacenti di un tabellone a blocchi."""
+    __slots__ = ('_blocchi', '_celle')
+
+    def __init__(self, blocchi: _Blocchi) -> None:
+        self._blocchi: _Blocchi = blocchi
+        self._celle: int = blocchi.righe * blocchi.colonne
+
+    def __getitem__(self, idx: int) -> int:
+        return self._blocchi.valore(idx) >> _SHIFT_ADIACENTI
+
+    def __contains__(self, idx: object) -> bool:
+        return isinstance(idx, int) and 0 <= idx < self._celle
+
+    def __len__(self) -> int:
+        return self._celle
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self._celle))
+
+
+class TabelloneABlocchi(Tabellone):
+    """
+    Tabellone con lo stato diviso in blocchi generati al primo accesso (vedi il modulo).
+    Espone la stessa interfaccia di Tabellone: mine, segnate e scoperte sono viste di
+    tipo insieme, mine_adiacenti_cache una mappa. Le mine non si possono imporre
+    (imposta_mine): vengono sempre dal seme e dalle caselle escluse al primo click.
+    """
+
+    def __init__(self, p: 'Partita', lato_blocco: int = 64, max_blocchi: int = 1024,
+                 percorso_appoggio: Optional[str] = None) -> None:
+        self._inizializza(p.altezza, p.larghezza, True, _geometria(p.altezza, p.larghezza))
+        self.strumentazione = p.strumentazione
+        file_appoggio: Optional[BinaryIO] = (open(percorso_appoggio, "w+b")
+                                             if percorso_appoggio is not None else None)
+        self._imposta_blocchi(_Blocchi(self.righe, self.colonne, lato_blocco, max_blocchi,
+                                       file_appoggio))
+
+    def _imposta_blocchi(self, blocchi: _Blocchi) -> None:
+        self._blocchi: _Blocchi = blocchi
+        self.mine: MutableSet[int] = _InsiemeBlocchi(blocchi, _MINA)
+        self.segnate: MutableSet[int] = _InsiemeBlocchi(blocchi, _SEGNATA)
+        self.scoperte: MutableSet[int] = _InsiemeBlocchi(blocchi, _SCOPERTA)
+        self.mine_adiacenti_cache: Mapping[int, int] = _AdiacenzeBlocchi(blocchi)
+
+    @classmethod
+    def copia_tabellone(cls, t: 'Tabellone') -> 'TabelloneABlocchi':
+        assert isinstance(t, TabelloneABlocchi)
+        copia = cls.__new__(cls)
+        copia._inizializza(t.righe, t.colonne, True, t._geometria)
+        copia.mine_piazzate = t.mine_piazzate
+        copia._impronta = t._impronta
+        copia._impronta_mine = t._impronta_mine
+        copia._imposta_blocchi(t._blocchi.copia())
+        return copia
+
+    @property
+    def lato_blocco(self) -> int:
+        return self._blocchi.lato
+
+    def piazza_mine(self, n_mine: int, esclusi: Iterable[int], rng: random.Random) -> None:
+        """Come Tabellone.piazza_mine, ma fissa solo il seme: i blocchi si generano dopo."""
+        self._imposta_generatore((rng.getrandbits(64), tuple(esclusi), n_mine))
+
+    def imposta_mine(self, mine: Iterable[int]) -> None:
+        raise ValueError("Un tabellone a blocchi genera le mine dal seme: disposizione non supportata.")
+
+    def imposta_mine_da(self, t: 'Tabellone') -> None:
+        assert isinstance(t, TabelloneABlocchi) and t._blocchi.generatore is not None
+        self._imposta_generatore(t._blocchi.generatore)
+
+    def _imposta_generatore(self, generatore: Tuple[int, Tuple[int, ...], int]) -> None:
+        seme, esclusi, n_mine = generatore
+        self._blocchi.imposta_generatore(seme, esclusi, n_mine)
+        # Le mine dipendono solo da seme ed esclusi: l'impronta delle mine si calcola da loro
+        self._impronta ^= self._impronta_mine
+        self._impronta_mine = _chiave_zobrist(seme, _MINA)
+        for idx in set(esclusi):
+            self._impronta_mine ^= _chiave_zobrist(idx, 0)
+        self._impronta ^= self._impronta_mine
+        self.mine_piazzate = True
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TabelloneABlocchi):
+            return super().__eq__(other)
+        return (self.fingerprint() == other.fingerprint() and
+                self.righe == other.righe and
+                self.colonne == other.colonne and
+                self._blocchi.generatore == other._blocchi.generatore and
+                set(self.segnate) == set(other.segnate) and
+                set(self.scoperte) == set(other.scoperte))
+
+    __hash__ = Tabellone.__hash__
+
+    def scopri_regione(self, idx: int) -> None:
+        """Come Tabellone.scopri_regione, con la visita fatta blocco per blocco (vedi _Blocchi)."""
+        strumentazione = self.strumentazione
+        inizio: int = strumentazione.inizio() if strumentazione is not None else 0
+        nuove: List[int] = self._blocchi.scopri_regione(idx)
+        for i in nuove:
+            self._impronta ^= _chiave_zobrist(i, _SCOPERTA)
+        self._nuove_scoperte.extend(nuove)
+        if strumentazione is not None:
+            strumentazione.conta("celle_scoperte", len(nuove))
+            strumentazione.registra("scopri_regione", inizio)
+
+    def applica_delta(self, delta: _Delta, inverso: bool = False) -> None:
+        # Come Tabellone.applica_delta, con una sola ricerca del blocco per casella
+        blocchi: _Blocchi = self._blocchi
+        cambia = blocchi.spegni if inverso else blocchi.accendi
+        for idx in delta.scoperte:
+            if bool(cambia(idx, _SCOPERTA) & _SCOPERTA) == inverso:
+                self._impronta ^= _chiave_zobrist(idx, _SCOPERTA)
+        for idx in delta.segnate:
+            if blocchi.accendi(idx, _SEGNATA) & _SEGNATA:
+                blocchi.spegni(idx, _SEGNATA)
+            self._impronta ^= _chiave_zobrist(idx, _SEGNATA)
+
+    def _celle_stato(self) -> bytearray:
+        """Buffer compatto di tutto il tabellone: da usare solo su tabelloni piccoli."""
+        celle = bytearray()
+        for riga in self._righe_stato():
+            celle += riga
+        return celle
+
+    def _righe_stato(self) -> Iterator[bytes]:
+        # Una fascia di blocchi alla volta: in memoria restano solo i blocchi della fascia
+        blocchi: _Blocchi = self._blocchi
+        for br in range(blocchi.blocchi_per_colonna):
+            fascia: List[bytearray] = [blocchi.blocco(br * blocchi.blocchi_per_riga + bc)
+                                       for bc in range(blocchi.blocchi_per_riga)]
+            larghezze: List[int] = [blocchi.forma(br * blocchi.blocchi_per_riga + bc)[3]
+                                    for bc in range(blocchi.blocchi_per_riga)]
+            for r in range(min(blocchi.lato, self.righe - br * blocchi.lato)):
+                yield b"".join([celle[r * w:(r + 1) * w] for celle, w in zip(fascia, larghezze)])
+
+    def righe_testo(self, nascondi_mine: bool = False) -> Iterator[str]:
+        tabella: bytes = _TABELLA_VISIBILE if nascondi_mine else _TABELLA_TESTO
+        for riga in self._righe_stato():
+            yield riga.translate(tabella).decode("ascii")
+
+    def memoria(self, interi: bool = True) -> int:
+        """Byte occupati in memoria dai blocchi residenti."""
+        return self._blocchi.memoria()
+
+
+class PartitaABlocchi(Partita):
+    """
+    Partita su un TabelloneABlocchi, con la stessa API di Partita. L'evoluzione tiene
+    come copia completa solo il tabellone iniziale (vuoto): copiare un tabellone enorme
+    ogni pochi passi costerebbe più delle differenze stesse.
+    """
+
+    politica_storia: PoliticaStoria = PoliticaStoria(intervallo_checkpoint=sys.maxsize)
+
+    def __init__(self, larghezza: int, altezza: int, n_mine: int,
+                 seme: Union[int, random.Random, None] = None, lato_blocco: int = 64,
+                 max_blocchi: int = 1024, percorso_appoggio: Optional[str] = None,
+                 politica_storia: Optional[PoliticaStoria] = None) -> None:
+        self.lato_blocco: int = lato_blocco
+        self.max_blocchi: int = max_blocchi  # blocchi residenti per tabellone
+        self.percorso_appoggio: Optional[str] = percorso_appoggio  # None: file temporaneo
+        super().__init__(larghezza, altezza, n_mine, compatto=True, seme=seme,
+                         politica_storia=politica_storia)
+
+    def _nuovo_tabellone(self, disposizione: Optional[Iterable[int]]) -> 'Tabellone':
+        if disposizione is not None:
+            raise ValueError("Una partita a blocchi genera le mine dal seme: disposizione non supportata.")
+        return TabelloneABlocchi(self, self.lato_blocco, self.max_blocchi, self.percorso_appoggio)
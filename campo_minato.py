@@ -1,32 +1,476 @@
-from typing import List, Set, Dict, Tuple, Optional
+from typing import Any, Callable, List, Set, Dict, Tuple, Optional, Iterable, Iterator, Collection, Mapping, MutableSet, NamedTuple, Sequence, TextIO, TYPE_CHECKING, TypeVar, Union, overload, cast
+from array import array
+from collections import OrderedDict
 import random
+import sys
+
+if TYPE_CHECKING:
+    # Importata solo da attiva_strumentazione: chi non misura non carica il modulo
+    from strumentazione import Strumentazione
+
+# Il formato compatto e le funzioni che lo elaborano (_MINA ... _scopri_in_celle, più
+# _Delta, _geometria e _T) sono l'API interna condivisa con blocchi.py: privati per chi
+# usa il modulo, ma da cambiare insieme a TabelloneABlocchi.
+
+# Modalità compatta: un solo byte per cella.
+# bit 0 -> mina, bit 1 -> segnata, bit 2 -> scoperta, bit 3-6 -> mine adiacenti (0-8)
+_MINA: int = 0x01
+_SEGNATA: int = 0x02
+_SCOPERTA: int = 0x04
+_SHIFT_ADIACENTI: int = 3
+
+# Tabelle per bytes.translate: 1 dove il bit è acceso, 0 altrimenti
+_TABELLE_BIT: Dict[int, bytes] = {
+    bit: bytes(1 if v & bit else 0 for v in range(256))
+    for bit in (_MINA, _SEGNATA, _SCOPERTA)
+}
+
+
+# Tabella per bytes.translate che tiene solo mina e adiacenti, azzerando lo stato di gioco
+_TABELLA_MINE_ADIACENTI: bytes = bytes(v & ~(_SEGNATA | _SCOPERTA) for v in range(256))
+
+_MASCHERA_64: int = (1 << 64) - 1
+
+
+def _carattere(v: int) -> int:
+    """Carattere di calcola_cella per la cella compatta v, come codice ASCII."""
+    if v & _SCOPERTA:
+        return ord("Z") if v & _MINA else ord("0") + (v >> _SHIFT_ADIACENTI)
+    if v & _SEGNATA:
+        return ord("Y") if v & _MINA else ord("D")
+    return ord("X") if v & _MINA else ord("C")
+
+
+# Tabella per bytes.translate: stato compatto della cella -> carattere di __str__
+_TABELLA_TESTO: bytes = bytes(_carattere(v) for v in range(256))
+# Come _TABELLA_TESTO ma per il giocatore: le mine coperte appaiono come caselle coperte
+_TABELLA_VISIBILE: bytes = bytes(_carattere(v if v & _SCOPERTA else v & ~_MINA) for v in range(256))
+
+
+def _chiave_zobrist(idx: int, bit: int) -> int:
+    """
+    Chiave a 64 bit dello stato `bit` (_MINA, _SEGNATA, _SCOPERTA) della casella idx.
+    Le chiavi sono calcolate al volo con il mescolamento di splitmix64 invece di essere
+    lette da una tabella: costano O(1) e nessuna memoria per cella.
+    """
+    z: int = ((idx << 3 | bit) * 0x9E3779B97F4A7C15) & _MASCHERA_64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASCHERA_64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASCHERA_64
+    return z ^ (z >> 31)
+
+
+def _somma_vicinato(righe_mine: List[int], colonne: int) -> bytearray:
+    """
+    Somma 3x3 vettorizzata. righe_mine sono le righe di una mappa delle mine con un byte
+    per casella e un bordo di una casella su ogni lato (colonne + 2 byte, prima e ultima
+    riga comprese), lette come interi little-endian: gli spostamenti di 8 bit sommano i
+    vicini orizzontali e le somme tra righe quelli verticali, tutto in aritmetica intera
+    (C) invece che cella per cella. Restituisce le caselle interne, un byte per cella già
+    nel formato del buffer compatto (bit di mina + adiacenti << 3).
+    """
+    ampiezza: int = colonne + 2
+    maschera: int = (1 << (8 * ampiezza)) - 1
+    orizzontali: List[int] = [(m + (m << 8) + (m >> 8)) & maschera for m in righe_mine]
+    celle = bytearray()
+    for r in range(1, len(righe_mine) - 1):
+        somma: int = orizzontali[r - 1] + orizzontali[r] + orizzontali[r + 1] - righe_mine[r]
+        somma = (somma << _SHIFT_ADIACENTI) + righe_mine[r]
+        celle += somma.to_bytes(ampiezza, 'little')[1:colonne + 1]
+    return celle
+
+
+def _scopri_in_celle(celle: bytearray, righe: int, colonne: int, semi: Iterable[int],
+                     fuori: Optional[Callable[[int, int], None]] = None) -> List[int]:
+    """
+    Scopre nel buffer compatto celle (righe x colonne) le caselle semi e, se vuote, le
+    loro regioni, e restituisce gli indici delle caselle nuove. Il bit "scoperta" fa da
+    segno di visita: il lavoro è proporzionale alle caselle nuove, perché una casella
+    vuota già scoperta ha già scoperto la sua regione. I vicini oltre il bordo (riga e
+    colonna relative, es. -1) vanno a fuori: un tabellone a blocchi prosegue la visita
+    nel blocco vicino.
+    """
+    nuove: List[int] = []
+    da_visitare: List[int] = []
+    for i in semi:
+        v: int = celle[i]
+        if not v & _SCOPERTA:
+            celle[i] = v | _SCOPERTA
+            nuove.append(i)
+            if not v >> _SHIFT_ADIACENTI:
+                da_visitare.append(i)
+    spostamenti: Tuple[int, ...] = (-colonne - 1, -colonne, -colonne + 1, -1,
+                                    1, colonne - 1, colonne, colonne + 1)
+    while da_visitare:
+        i = da_visitare.pop()
+        r, c = divmod(i, colonne)
+        if 0 < r < righe - 1 and 0 < c < colonne - 1:
+            # Caso comune: casella interna, vicini senza controlli sui bordi
+            vicini: List[int] = [i + d for d in spostamenti]
+        else:
+            vicini = []
+            for vr in range(r - 1, r + 2):
+                for vc in range(c - 1, c + 2):
+                    if 0 <= vr < righe and 0 <= vc < colonne:
+                        if vr != r or vc != c:
+                            vicini.append(vr * colonne + vc)
+                    elif fuori is not None:
+                        fuori(vr, vc)
+        for j in vicini:
+            v = celle[j]
+            if not v & _SCOPERTA:
+                celle[j] = v | _SCOPERTA
+                nuove.append(j)
+                if not v >> _SHIFT_ADIACENTI:
+                    da_visitare.append(j)
+    return nuove
+
+
+# Elementi generici per la firma di AbstractSet._from_iterable
+_T = TypeVar('_T')
+
+
+class _InsiemeCompatto(MutableSet[int]):
+    """Vista di tipo insieme su un bit del buffer di un tabellone compatto."""
+    __slots__ = ('_celle', '_bit', '_n')
+
+    def __init__(self, celle: bytearray, bit: int, n: int = 0) -> None:
+        self._celle: bytearray = celle
+        self._bit: int = bit
+        self._n: int = n
+
+    def __contains__(self, idx: object) -> bool:
+        return (isinstance(idx, int) and 0 <= idx < len(self._celle)
+                and bool(self._celle[idx] & self._bit))
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __iter__(self) -> Iterator[int]:
+        # La scansione avviene in C: translate + find invece di un ciclo per cella
+        marcate = self._celle.translate(_TABELLE_BIT[self._bit])
+        idx = marcate.find(1)
+        while idx != -1:
+            yield idx
+            idx = marcate.find(1, idx + 1)
+
+    def add(self, idx: int) -> None:
+        if not self._celle[idx] & self._bit:
+            self._celle[idx] |= self._bit
+            self._n += 1
+
+    def discard(self, idx: int) -> None:
+        if self._celle[idx] & self._bit:
+            self._celle[idx] &= ~self._bit & 0xFF
+            self._n -= 1
+
+    @classmethod
+    def _from_iterable(cls, it: Iterable[_T]) -> Set[_T]:
+        # Le operazioni tra insiemi (-, &, |) restituiscono insiemi normali, non viste
+        return set(it)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, _InsiemeCompatto) and other._bit == self._bit:
+            tabella = _TABELLE_BIT[self._bit]
+            return (self._n == other._n and
+                    self._celle.translate(tabella) == other._celle.translate(tabella))
+        return super().__eq__(other)
+
+
+class _AdiacenzeCompatte(Mapping[int, int]):
+    """Vista in sola lettura delle mine adiacenti salvate nei bit 3-6 del buffer compatto."""
+    __slots__ = ('_celle',)
+
+    def __init__(self, celle: bytearray) -> None:
+        self._celle: bytearray = celle
+
+    def __getitem__(self, idx: int) -> int:
+        return self._celle[idx] >> _SHIFT_ADIACENTI
+
+    def __contains__(self, idx: object) -> bool:
+        return isinstance(idx, int) and 0 <= idx < len(self._celle)
+
+    def __len__(self) -> int:
+        return len(self._celle)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self._celle)))
+
+
+class _Adiacenze(Dict[int, int]):
+    """Mine adiacenti in forma sparsa: solo le caselle con almeno una mina vicina."""
+
+    def __missing__(self, idx: int) -> int:
+        return 0
+
+
+_SPOSTAMENTI_8: Tuple[Tuple[int, int], ...] = tuple(
+    (dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if (dr, dc) != (0, 0))
+
+
+class _Geometria:
+    """
+    Tabelle dei vicini di tutti i tabelloni righe x colonne, in formato CSR: i vicini
+    della casella idx sono indici[inizio[idx]:inizio[idx + 1]], in ordine per righe.
+    Costano 4 byte per vicino (circa 36 byte per cella con 8-adiacenza) e sono condivise
+    da tutti i tabelloni della stessa dimensione (vedi _geometria).
+    """
+
+    def __init__(self, righe: int, colonne: int) -> None:
+        self.righe: int = righe
+        self.colonne: int = colonne
+        self.inizio8, self.indici8 = self._costruisci(_SPOSTAMENTI_8)
+
+    def _costruisci(self, spostamenti: Tuple[Tuple[int, int], ...]
+                    ) -> Tuple['array[int]', 'array[int]']:
+        righe, colonne = self.righe, self.colonne
+        inizio: 'array[int]' = array("i", [0])
+        indici: 'array[int]' = array("i")
+        for r in range(righe):
+            # Spostamenti validi per la riga r: dipendono solo dai bordi verticali
+            validi = [(dr * colonne + dc, dc) for dr, dc in spostamenti if 0 <= r + dr < righe]
+            base: int = r * colonne
+            for c in ((0, colonne - 1) if colonne > 1 else (0,)):
+                if c == colonne - 1 and colonne > 2:
+                    # Prima dell'ultima colonna le interne, tutte con gli stessi spostamenti:
+                    # si scrivono a passo fisso, uno spostamento alla volta, senza cicli Python
+                    passo: int = len(validi)
+                    interne: 'array[int]' = array("i", bytes(4 * passo * (colonne - 2)))
+                    for k, (spostamento, _) in enumerate(validi):
+                        interne[k::passo] = array("i", range(base + 1 + spostamento,
+                                                             base + colonne - 1 + spostamento))
+                    totale: int = len(indici)
+                    indici.extend(interne)
+                    inizio.extend(range(totale + passo, len(indici) + 1, passo))
+                indici.extend([base + c + spostamento for spostamento, dc in validi
+                               if 0 <= c + dc < colonne])
+                inizio.append(len(indici))
+        return inizio, indici
+
+
+# Geometrie usate di recente, dalla meno recente; le dimensioni oltre la soglia non si
+# memorizzano (le tabelle costerebbero troppo) e calcolano i vicini al volo
+_GEOMETRIE: 'OrderedDict[Tuple[int, int], _Geometria]' = OrderedDict()
+_MAX_GEOMETRIE: int = 8
+_MAX_CELLE_GEOMETRIA: int = 1 << 18
+
+
+def _geometria(righe: int, colonne: int) -> Optional[_Geometria]:
+    if righe * colonne > _MAX_CELLE_GEOMETRIA:
+        return None
+    chiave: Tuple[int, int] = (righe, colonne)
+    geometria: Optional[_Geometria] = _GEOMETRIE.get(chiave)
+    if geometria is None:
+        geometria = _GEOMETRIE[chiave] = _Geometria(righe, colonne)
+        if len(_GEOMETRIE) > _MAX_GEOMETRIE:
+            _GEOMETRIE.popitem(last=False)
+    else:
+        _GEOMETRIE.move_to_end(chiave)
+    return geometria
+
+
+# Azioni del giocatore registrate nelle mosse
+AZIONE_SCOPRI: int = 0
+AZIONE_SEGNA: int = 1
+AZIONE_INDIETRO: int = 2
+AZIONE_AVANTI: int = 3
+AZIONE_SCOPRI_VICINI: int = 4  # "accordo": scopre i vicini non segnati di un numero soddisfatto
+
+
+class Mossa(NamedTuple):
+    riga: int
+    colonna: int
+    azione: int = AZIONE_SCOPRI
+
+
+class _Delta(NamedTuple):
+    """
+    Differenza tra due tabelloni consecutivi dell'evoluzione. Gli indici sono array
+    compatti (4 byte per casella, vedi _codice_indici) e non tuple di int Python.
+    """
+    scoperte: 'array[int]'  # caselle scoperte dalla mossa
+    segnate: 'array[int]'   # caselle di cui la mossa ha invertito il contrassegno
+
+
+def _codice_indici(celle: int) -> str:
+    """Typecode di array sufficiente per gli indici di un tabellone di `celle` caselle."""
+    return 'i' if celle <= 1 << 31 else 'q'
+
+
 class Tabellone:
-    
+    """
+    Tabellone di gioco.
+
+    Nella modalità predefinita mine, caselle segnate e scoperte sono insiemi di indici
+    e le mine adiacenti un dizionario sparso indice -> numero (solo le caselle vicine
+    a una mina): la memoria cresce con mine e caselle scoperte, fino a circa 70 byte
+    per cella.
+    Con p.compatto tutto lo stato vive in un unico bytearray (vedi _MINA, _SEGNATA,
+    _SCOPERTA, _SHIFT_ADIACENTI): 1 byte per cella, cioè 4 MB per un tabellone 2000x2000.
+    In entrambe le modalità mine, segnate, scoperte e mine_adiacenti_cache espongono
+    la stessa interfaccia (insiemi e mappa), quindi il resto del codice non cambia.
+
+    Lo stato (mine, segnate, scoperte) ha un'impronta di Zobrist aggiornata a ogni
+    modifica: fingerprint() e __hash__ costano O(1) e __eq__ la usa per escludere subito
+    i tabelloni diversi. Come per ogni oggetto mutabile, un tabellone usato come chiave
+    di un dizionario o in un insieme non va più modificato.
+    """
+
+    # Strumentazione della partita (vedi Partita.attiva_strumentazione); le copie non ce l'hanno
+    strumentazione: Optional['Strumentazione'] = None
+
     def __init__(self, p:'Partita') -> None:
-        self.righe: int = p.altezza
-        self.colonne: int = p.larghezza
-        self.segnate: Set[int] = set()
-        self.scoperte: Set[int] = set()
-        self.tabella: List[List[str]] = [['C' for _ in range(self.colonne)] 
-                                              for _ in range(self.righe)]
-        self.mine: Set[int] = set(random.sample(range(self.righe * self.colonne), p.n_mine))
-        self.mine_adiacenti_cache: Dict[int, int] = self.get_mine_adiacenti()
-        
+        # Tabelle dei vicini condivise con gli altri tabelloni della stessa dimensione
+        self._inizializza(p.altezza, p.larghezza, p.compatto, _geometria(p.altezza, p.larghezza))
+        self.strumentazione = p.strumentazione
+        if self.compatto:
+            self._celle: bytearray = bytearray(self.righe * self.colonne)
+            self.mine: MutableSet[int] = _InsiemeCompatto(self._celle, _MINA)
+            self.segnate: MutableSet[int] = _InsiemeCompatto(self._celle, _SEGNATA)
+            self.scoperte: MutableSet[int] = _InsiemeCompatto(self._celle, _SCOPERTA)
+            self.mine_adiacenti_cache: Mapping[int, int] = _AdiacenzeCompatte(self._celle)
+        else:
+            self.segnate = set()
+            self.scoperte = set()
+            self.mine = set()
+            self.mine_adiacenti_cache = _Adiacenze()
+
+    def _inizializza(self, righe: int, colonne: int, compatto: bool,
+                     geometria: Optional['_Geometria']) -> None:
+        """
+        Attributi comuni a costruttori e copie di Tabellone e sottoclassi, per un tabellone
+        senza mine né stato di gioco: le strutture di mine e caselle le crea il chiamante.
+        """
+        self.righe: int = righe
+        self.colonne: int = colonne
+        self.compatto: bool = compatto
+        self._geometria: Optional[_Geometria] = geometria
+        # Le mine vengono piazzate al primo click (vedi piazza_mine), non qui
+        self.mine_piazzate: bool = False
+        self._impronta: int = 0
+        self._impronta_mine: int = 0  # parte dell'impronta dovuta alle mine
+        # Modifiche non ancora registrate nell'evoluzione (vedi preleva_modifiche)
+        self._nuove_scoperte: List[int] = []
+        self._segnate_invertite: Set[int] = set()
+
     @classmethod
     def copia_tabellone(cls, t:'Tabellone') -> 'Tabellone':
         copia = cls.__new__(cls)
-        copia.righe = t.righe
-        copia.colonne = t.colonne
-        copia.tabella = [riga[:] for riga in t.tabella]  # Copia profonda
-        copia.mine = t.mine.copy()
-        copia.segnate = t.segnate.copy()
-        copia.scoperte = t.scoperte.copy()
-        copia.mine_adiacenti_cache = t.mine_adiacenti_cache.copy()
+        copia._inizializza(t.righe, t.colonne, t.compatto, t._geometria)
+        copia.mine_piazzate = t.mine_piazzate
+        copia._impronta = t._impronta
+        copia._impronta_mine = t._impronta_mine
+        if t.compatto:
+            copia._celle = t._celle[:]
+            copia.mine = _InsiemeCompatto(copia._celle, _MINA, len(t.mine))
+            copia.segnate = _InsiemeCompatto(copia._celle, _SEGNATA, len(t.segnate))
+            copia.scoperte = _InsiemeCompatto(copia._celle, _SCOPERTA, len(t.scoperte))
+            copia.mine_adiacenti_cache = _AdiacenzeCompatte(copia._celle)
+        else:
+            copia.mine = set(t.mine)
+            copia.segnate = set(t.segnate)
+            copia.scoperte = set(t.scoperte)
+            copia.mine_adiacenti_cache = _Adiacenze(t.mine_adiacenti_cache)
         return copia
 
+    @property
+    def tabella(self) -> List[List[str]]:
+        """Matrice dei caratteri di __str__, costruita su richiesta."""
+        return [list(riga) for riga in str(self).split("\n")]
+
+    def piazza_mine(self, n_mine: int, esclusi: Iterable[int], rng: random.Random) -> None:
+        """
+        Piazza n_mine mine a caso fuori dalle caselle escluse. Si estraggono n_mine
+        posizioni dall'intervallo delle caselle non escluse e le si riportano sugli indici
+        veri, quindi sia l'estrazione sia il calcolo delle adiacenze costano O(n_mine)
+        anche su tabelloni enormi e radi.
+        """
+        esclusi_ordinati: List[int] = sorted(set(esclusi))
+        posizioni: List[int] = rng.sample(range(self.righe * self.colonne - len(esclusi_ordinati)),
+                                          n_mine)
+        mine: List[int] = []
+        for idx in posizioni:
+            for escluso in esclusi_ordinati:
+                if escluso > idx:
+                    break
+                idx += 1
+            mine.append(idx)
+        self.imposta_mine(mine)
+
+    def imposta_mine(self, mine: Iterable[int]) -> None:
+        """Piazza le mine indicate, con adiacenze e impronta (il tabellone non deve averne)."""
+        mine = list(mine)
+        if self.compatto:
+            if len(mine) * 64 < len(self._celle):
+                # Poche mine: conviene incrementare i soli vicini di ogni mina
+                for idx in mine:
+                    self.mine.add(idx)
+                    for j in self.vicini(idx):
+                        self._celle[j] += 1 << _SHIFT_ADIACENTI
+            else:
+                # Molte mine: somma 3x3 vettorizzata. Prima del primo click l'unico
+                # stato da preservare sono i contrassegni
+                segnate: List[int] = list(self.segnate)
+                colonne: int = self.colonne
+                bitmap = bytearray(self.righe * colonne)
+                for idx in mine:
+                    bitmap[idx] = 1
+                # Righe con il bordo: un byte a sinistra (<< 8), a destra e due righe vuote
+                righe_mine: List[int] = [0] + [
+                    int.from_bytes(bitmap[r * colonne:(r + 1) * colonne], 'little') << 8
+                    for r in range(self.righe)] + [0]
+                self._celle[:] = _somma_vicinato(righe_mine, colonne)
+                for idx in segnate:
+                    self._celle[idx] |= _SEGNATA
+                self.mine = _InsiemeCompatto(self._celle, _MINA, len(mine))
+        else:
+            self.mine = set(mine)
+            self.mine_adiacenti_cache = self.get_mine_adiacenti()
+        self._impronta_mine = 0
+        for idx in mine:
+            self._impronta_mine ^= _chiave_zobrist(idx, _MINA)
+        self._impronta ^= self._impronta_mine
+        self.mine_piazzate = True
+
+    def imposta_mine_da(self, t: 'Tabellone') -> None:
+        """Come imposta_mine, ma copia mine e adiacenze già calcolate da t invece di ricalcolarle."""
+        if self.compatto:
+            segnate: List[int] = list(self.segnate)
+            self._celle[:] = t._celle.translate(_TABELLA_MINE_ADIACENTI)
+            for idx in segnate:
+                self._celle[idx] |= _SEGNATA
+            self.mine = _InsiemeCompatto(self._celle, _MINA, len(t.mine))
+        else:
+            self.mine = set(t.mine)
+            self.mine_adiacenti_cache = _Adiacenze(t.mine_adiacenti_cache)
+        self._impronta_mine = t._impronta_mine
+        self._impronta ^= self._impronta_mine
+        self.mine_piazzate = True
+
+    def memoria(self, interi: bool = True) -> int:
+        """
+        Stima in byte dello stato del tabellone (la geometria è condivisa con gli altri
+        tabelloni della stessa dimensione e non si conta). Con interi=False non si contano
+        gli int Python contenuti negli insiemi: una copia li condivide con l'originale.
+        """
+        if self.compatto:
+            return sys.getsizeof(self._celle)
+        contenitori: Tuple[Collection[int], ...] = (self.mine, self.segnate, self.scoperte,
+                                                   self.mine_adiacenti_cache)
+        return sum(sys.getsizeof(x) + (_BYTE_INTERO * len(x) if interi else 0)
+                   for x in contenitori)
+
+    def fingerprint(self) -> int:
+        """Impronta a 64 bit di dimensioni e stato del tabellone, in O(1)."""
+        return self._impronta ^ _chiave_zobrist(self.righe * 0x10000 + self.colonne, 0)
+
+    def __hash__(self) -> int:
+        return self.fingerprint()
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Tabellone):
             return False
+        if self.fingerprint() != other.fingerprint():
+            return False  # impronte diverse: stati sicuramente diversi
         return (self.righe == other.righe and
                 self.colonne == other.colonne and
                 self.mine == other.mine and
@@ -39,40 +483,111 @@ class Tabellone:
             self.segnate.remove(idx) 
         else:
             self.segnate.add(idx)         
+        self._impronta ^= _chiave_zobrist(idx, _SEGNATA)
+        self._segnate_invertite ^= {idx}
          
     def is_segnata(self, r: int, c: int) -> bool:
         return self.get_idx(r, c) in self.segnate 
     
     def scopri_casella(self, r:int, c:int) -> None:
         idx: int = self.get_idx(r, c)
-        self.scoperte.add(idx)  
+        if idx not in self.scoperte:
+            self.scoperte.add(idx)
+            self._impronta ^= _chiave_zobrist(idx, _SCOPERTA)
+            self._nuove_scoperte.append(idx)
         
     def is_coperta(self, r: int, c: int) -> bool:
         idx: int = self.get_idx(r, c)
         return idx not in self.scoperte
 
+    def scopri_regione(self, idx: int) -> None:
+        """
+        Scopre la casella idx e, se vuota, tutta la sua regione: la regione connessa
+        (8-adiacenza) di caselle vuote più il suo bordo numerato. Lo stato
+        "scoperta" fa da segno di visita: il lavoro è proporzionale alle caselle nuove,
+        perché una casella vuota già scoperta ha già scoperto la sua regione. In modalità
+        compatta la visita è quella di _scopri_in_celle, comune ai tabelloni a blocchi.
+        """
+        strumentazione = self.strumentazione
+        inizio: int = strumentazione.inizio() if strumentazione is not None else 0
+        nuove: List[int] = []
+        if self.compatto:
+            nuove = _scopri_in_celle(self._celle, self.righe, self.colonne, (idx,))
+            # Il buffer è stato scritto direttamente: si aggiorna il conteggio della vista
+            cast(_InsiemeCompatto, self.scoperte)._n += len(nuove)
+        elif idx not in self.scoperte:
+            scoperte: MutableSet[int] = self.scoperte
+            adiacenti: Mapping[int, int] = self.mine_adiacenti_cache
+            scoperte.add(idx)
+            nuove.append(idx)
+            da_visitare: List[int] = [] if adiacenti[idx] else [idx]
+            while da_visitare:
+                for j in self.vicini(da_visitare.pop()):
+                    if j not in scoperte:
+                        scoperte.add(j)
+                        nuove.append(j)
+                        if not adiacenti[j]:
+                            da_visitare.append(j)
+        for i in nuove:
+            self._impronta ^= _chiave_zobrist(i, _SCOPERTA)
+        self._nuove_scoperte.extend(nuove)
+        if strumentazione is not None:
+            strumentazione.conta("celle_scoperte", len(nuove))
+            strumentazione.registra("scopri_regione", inizio)
+
+    def preleva_modifiche(self) -> _Delta:
+        """Restituisce le modifiche fatte dall'ultimo prelievo e azzera il registro."""
+        codice: str = _codice_indici(self.righe * self.colonne)
+        delta = _Delta(array(codice, self._nuove_scoperte), array(codice, self._segnate_invertite))
+        self._nuove_scoperte = []
+        self._segnate_invertite = set()
+        return delta
+
+    def applica_delta(self, delta: _Delta, inverso: bool = False) -> None:
+        """Applica (o annulla, se inverso) una differenza in O(caselle cambiate), senza registrarla."""
+        for idx in delta.scoperte:
+            if (idx in self.scoperte) == inverso:
+                if inverso:
+                    self.scoperte.discard(idx)
+                else:
+                    self.scoperte.add(idx)
+                self._impronta ^= _chiave_zobrist(idx, _SCOPERTA)
+        for idx in delta.segnate:
+            if idx in self.segnate:
+                self.segnate.remove(idx)
+            else:
+                self.segnate.add(idx)
+            self._impronta ^= _chiave_zobrist(idx, _SEGNATA)
+
+    def vicini(self, idx: int) -> Sequence[int]:
+        """Indici delle (fino a 8) caselle adiacenti a idx, in ordine per righe."""
+        geometria: Optional[_Geometria] = self._geometria
+        if geometria is not None:
+            inizio: 'array[int]' = geometria.inizio8
+            return geometria.indici8[inizio[idx]:inizio[idx + 1]]
+        colonne: int = self.colonne
+        r, c = divmod(idx, colonne)
+        if 0 < r < self.righe - 1 and 0 < c < colonne - 1:
+            # Caso comune: casella interna, nessun controllo sui bordi
+            return [idx - colonne - 1, idx - colonne, idx - colonne + 1, idx - 1,
+                    idx + 1, idx + colonne - 1, idx + colonne, idx + colonne + 1]
+        return [rr * colonne + cc
+                for rr in range(max(r - 1, 0), min(r + 2, self.righe))
+                for cc in range(max(c - 1, 0), min(c + 2, colonne))
+                if rr != r or cc != c]
+
     # metodo aggiuntivo
     def get_mine_adiacenti(self) -> Dict[int, int]:
-        adiacenti: Dict[int, int] = {}
-        for r in range(self.righe):
-            for c in range(self.colonne):
-                idx: int = self.get_idx(r, c)
-                adiacenti[idx] = self.mine_adiacenti(r, c)
+        adiacenti: _Adiacenze = _Adiacenze()
+        conteggio = adiacenti.get  # più veloce di __missing__ per le chiavi nuove
+        for idx in self.mine:
+            for j in self.vicini(idx):
+                adiacenti[j] = conteggio(j, 0) + 1
         return adiacenti
-    
+
     def mine_adiacenti(self, r: int, c: int) -> int:
-        count: int = 0
-        adjacent: List[Tuple[int, int]] = [
-            (r + dr, c + dc)
-            for dr in (-1, 0, 1)
-            for dc in (-1, 0, 1)
-            if (dr, dc) != (0, 0)
-        ]
-        for r, c in adjacent:
-            if 0 <= r < self.righe and 0 <= c < self.colonne:
-                if self.get_idx(r, c) in self.mine:
-                    count += 1
-        return count
+        mine: MutableSet[int] = self.mine
+        return sum(1 for j in self.vicini(self.get_idx(r, c)) if j in mine)
     
     def get_idx(self, r: int, c: int) -> int:
         idx = r  * self.colonne + c 
@@ -95,37 +610,439 @@ class Tabellone:
         else:
             return "C" if idx not in self.mine else "X"  # Covered, empty or mine
 
+    def _celle_stato(self) -> bytearray:
+        """
+        Stato di tutte le celle nel formato compatto (vedi _MINA, _SEGNATA, _SCOPERTA,
+        _SHIFT_ADIACENTI). In modalità compatta è il buffer stesso, da non modificare;
+        altrimenti viene costruito dagli insiemi in O(mine + caselle scoperte e segnate).
+        """
+        if self.compatto:
+            return self._celle
+        celle = bytearray(self.righe * self.colonne)
+        for idx, n in self.mine_adiacenti_cache.items():
+            celle[idx] = n << _SHIFT_ADIACENTI
+        for bit, insieme in ((_MINA, self.mine), (_SEGNATA, self.segnate),
+                             (_SCOPERTA, self.scoperte)):
+            for idx in insieme:
+                celle[idx] |= bit
+        return celle
+
+    def righe_testo(self, nascondi_mine: bool = False) -> Iterator[str]:
+        """
+        Le righe di __str__ una alla volta, ognuna tradotta in blocco con _TABELLA_TESTO.
+        Con nascondi_mine le mine non ancora scoperte appaiono come "C" o "D", cioè come
+        le vede il giocatore.
+        """
+        tabella: bytes = _TABELLA_VISIBILE if nascondi_mine else _TABELLA_TESTO
+        celle: bytearray = self._celle_stato()
+        for inizio in range(0, self.righe * self.colonne, self.colonne):
+            yield celle[inizio:inizio + self.colonne].translate(tabella).decode("ascii")
+
     def __str__(self) -> str:
-        result: List[str] = []
-        for r in range(self.righe):
-            row: List[str] = []
-            for c in range(self.colonne):
-                idx = self.get_idx(r+1, c+1)
-                # Usa la funzione calcola_cella per ottenere il valore della cella
-                row.append(self.calcola_cella(idx))
-            result.append("".join(row))
-        return "\n".join(result)
+        strumentazione = self.strumentazione
+        inizio: int = strumentazione.inizio() if strumentazione is not None else 0
+        testo: bytearray = self._celle_stato().translate(_TABELLA_TESTO)
+        c: int = self.colonne
+        risultato: str = b"\n".join([testo[i:i + c] for i in range(0, len(testo), c)]).decode("ascii")
+        if strumentazione is not None:
+            strumentazione.registra("render", inizio)
+        return risultato
     
+# ——————————————————————————————————————————————————————————————————————————————————————–————   
+class PoliticaStoria(NamedTuple):
+    """
+    Quanta storia conserva una partita (vedi _Storia); con i valori predefiniti tutta.
+    Si salva una copia completa del tabellone (checkpoint) quando dal checkpoint
+    precedente sono passati almeno intervallo_checkpoint passi e le differenze pesano
+    almeno quanto la copia: la memoria dei checkpoint non supera quella delle differenze. Con
+    max_annullamenti si possono annullare al più tanti passi dall'ultimo tabellone; con
+    memoria_massima (byte per checkpoint, differenze e mosse) oltre il limite si scartano
+    prima le differenze più vecchie, poi ricostruite rigiocando le mosse, e poi i passi
+    più vecchi. Un checkpoint resta sempre: con un limite più piccolo la storia occupa
+    fino a circa due volte la copia del tabellone.
+    """
+    intervallo_checkpoint: int = 64
+    max_annullamenti: Optional[int] = None
+    memoria_massima: Optional[int] = None
+
+
+# Stime per PoliticaStoria.memoria_massima: un int Python (indice di casella) e una Mossa
+_BYTE_INTERO: int = sys.getsizeof(1 << 20)
+_BYTE_MOSSA: int = sys.getsizeof(Mossa(0, 0, 0))
+
+
+def _memoria_delta(delta: _Delta) -> int:
+    return sys.getsizeof(delta) + sys.getsizeof(delta.scoperte) + sys.getsizeof(delta.segnate)
+
+
+def _memoria_passo(mosse: Optional[Tuple[Mossa, ...]]) -> int:
+    return 0 if mosse is None else sys.getsizeof(mosse) + _BYTE_MOSSA * len(mosse)
+
+
+def _ripeti_passo(tabellone: 'Tabellone', mosse: Iterable[Mossa]) -> None:
+    """
+    Rigioca sul tabellone (con le mine già piazzate) le mosse eseguite di un passo, come
+    le ha eseguite Partita: dopo una mina scoperta non c'erano altre mosse.
+    """
+    for r, c, azione in mosse:
+        idx: int = tabellone.get_idx(r, c)
+        if azione == AZIONE_SEGNA:
+            tabellone.segna_casella(r, c)
+        elif azione == AZIONE_SCOPRI:
+            _scopri_su(tabellone, idx)
+        elif azione == AZIONE_SCOPRI_VICINI:
+            for j in tabellone.vicini(idx):
+                if j not in tabellone.scoperte and j not in tabellone.segnate:
+                    if _scopri_su(tabellone, j):
+                        break
+
+
+def _scopri_su(tabellone: 'Tabellone', idx: int) -> bool:
+    """Scopre la casella idx e, se sicura, la sua regione; True se era una mina."""
+    if idx in tabellone.mine:
+        tabellone.scopri_casella(*divmod(idx, tabellone.colonne))
+        return True
+    tabellone.scopri_regione(idx)
+    return False
+
+
+class _Storia(Sequence['Tabellone']):
+    """
+    Evoluzione di una partita salvata come differenze tra tabelloni consecutivi, con una
+    copia completa (checkpoint) quando le differenze dall'ultima pesano quanto il tabellone
+    (vedi PoliticaStoria). La memoria cresce con le caselle cambiate e non con mosse x
+    caselle; storia[i] viene ricostruito solo quando richiesto, partendo dal checkpoint
+    precedente, con al più una copia e differenze grandi quanto il tabellone.
+
+    Per ogni passo si conservano anche le mosse eseguite, così una differenza scartata per
+    rispettare la PoliticaStoria si ricostruisce rigiocandole. I passi dimenticati lo sono
+    a partire dal primo: gli indici restano quelli della partita, ma storia[i] esiste
+    solo da storia.primo in poi e i checkpoint conservati formano un anello che avanza
+    con la partita.
+    """
+
+    def __init__(self, iniziale: 'Tabellone', politica: PoliticaStoria = PoliticaStoria()) -> None:
+        if politica.intervallo_checkpoint < 1:
+            raise ValueError("L'intervallo tra i checkpoint deve essere positivo.")
+        self._politica: PoliticaStoria = politica
+        self._base: int = 0  # indice del primo tabellone conservato, sempre un checkpoint
+        self._checkpoint: Dict[int, 'Tabellone'] = {0: type(iniziale).copia_tabellone(iniziale)}
+        self._memoria_checkpoint: Dict[int, int] = {0: self._checkpoint[0].memoria(interi=False)}
+        # _delta[i - base] porta da storia[i] a storia[i + 1]; None se scartata
+        self._delta: List[Optional[_Delta]] = []
+        # _passi[i - base]: id della prima mossa del passo e mosse eseguite (None se ignote)
+        self._passi: List[Tuple[int, Optional[Tuple[Mossa, ...]]]] = []
+        self._id_base: int = 0  # id della prima mossa del passo base
+        self._memoria_delta: int = 0
+        self._memoria_passi: int = 0
+        self._esaminate: int = 0  # differenze iniziali già considerate per lo scarto
+        self._dall_checkpoint: int = 0  # byte di differenze e mosse dall'ultimo checkpoint
+
+    @classmethod
+    def da_tabelloni(cls, tabelloni: Sequence['Tabellone']) -> '_Storia':
+        storia = cls(tabelloni[0])
+        for prima, dopo in zip(tabelloni, tabelloni[1:]):
+            codice: str = _codice_indici(dopo.righe * dopo.colonne)
+            delta = _Delta(array(codice, dopo.scoperte - prima.scoperte),
+                           array(codice, dopo.segnate ^ prima.segnate))
+            storia.aggiungi(delta, dopo)
+        return storia
+
+    def __len__(self) -> int:
+        return self._base + len(self._delta) + 1
+
+    @property
+    def primo(self) -> int:
+        """Indice del tabellone più vecchio ancora disponibile (e a cui si può tornare)."""
+        massimo: Optional[int] = self._politica.max_annullamenti
+        return self._base if massimo is None else max(self._base, len(self) - 1 - massimo)
+
+    @overload
+    def __getitem__(self, i: int) -> 'Tabellone': ...
+    @overload
+    def __getitem__(self, i: slice) -> List['Tabellone']: ...
+    def __getitem__(self, i: Union[int, slice]) -> Union['Tabellone', List['Tabellone']]:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self))) if j >= self.primo]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("indice dell'evoluzione fuori intervallo")
+        if i < self.primo:
+            raise IndexError("tabellone dell'evoluzione non più conservato")
+        return self._ricostruisci(i)
+
+    def _ricostruisci(self, i: int) -> 'Tabellone':
+        base: int = max(k for k in self._checkpoint if k <= i)
+        checkpoint: 'Tabellone' = self._checkpoint[base]
+        tabellone: 'Tabellone' = type(checkpoint).copia_tabellone(checkpoint)
+        for j in range(base, i):
+            self._avanza(tabellone, j)
+        return tabellone
+
+    def _avanza(self, tabellone: 'Tabellone', i: int) -> None:
+        """Porta tabellone da storia[i] a storia[i + 1]."""
+        delta: Optional[_Delta] = self._delta[i - self._base]
+        if delta is not None:
+            tabellone.applica_delta(delta)
+        else:
+            _ripeti_passo(tabellone, self._passi[i - self._base][1] or ())
+            tabellone.preleva_modifiche()
+
+    def __iter__(self) -> Iterator['Tabellone']:
+        for corrente in self.scorri():
+            yield type(corrente).copia_tabellone(corrente)
+
+    def scorri(self) -> Iterator['Tabellone']:
+        """
+        Come iter(storia), da storia.primo in poi, ma senza copie: restituisce sempre lo
+        stesso tabellone di lavoro, fatto avanzare passo per passo. Va letto prima di
+        chiedere il successivo e mai modificato.
+        """
+        iniziale: 'Tabellone' = self._checkpoint[self._base]
+        corrente: 'Tabellone' = type(iniziale).copia_tabellone(iniziale)
+        primo: int = self.primo
+        for i in range(self._base, len(self)):
+            if i >= primo:
+                yield corrente
+            if i < len(self) - 1:
+                self._avanza(corrente, i)
+
+    def delta(self, i: int) -> _Delta:
+        """Differenza da storia[i] a storia[i + 1], ricostruita se è stata scartata."""
+        delta: Optional[_Delta] = self._delta[i - self._base]
+        if delta is None:
+            tabellone: 'Tabellone' = self._ricostruisci(i)
+            _ripeti_passo(tabellone, self._passi[i - self._base][1] or ())
+            delta = tabellone.preleva_modifiche()
+        return delta
+
+    def passo(self, i: int) -> Tuple[int, Optional[Tuple[Mossa, ...]]]:
+        """Id della prima mossa e mosse del passo i (da storia[i] a storia[i + 1])."""
+        return self._passi[i - self._base]
+
+    def mosse(self) -> Iterator[Tuple[int, Mossa]]:
+        """(id, mossa) delle mosse dei passi conservati."""
+        for prima, mosse in self._passi:
+            for k, mossa in enumerate(mosse or ()):
+                yield prima + k, mossa
+
+    def mossa(self, id_mossa: int) -> Optional[Mossa]:
+        """Mossa con quell'id se è tra quelle dei passi conservati, altrimenti None."""
+        basso: int = 0
+        alto: int = len(self._passi)
+        while basso < alto:  # primo passo che inizia dopo id_mossa
+            medio: int = (basso + alto) // 2
+            if self._passi[medio][0] <= id_mossa:
+                basso = medio + 1
+            else:
+                alto = medio
+        if basso == 0:
+            return None
+        prima, mosse = self._passi[basso - 1]
+        if mosse is None or id_mossa - prima >= len(mosse):
+            return None
+        return mosse[id_mossa - prima]
+
+    def _id_passo(self, i: int) -> int:
+        """Id della prima mossa del passo i, anche se è il prossimo da aggiungere."""
+        if i - self._base < len(self._passi):
+            return self._passi[i - self._base][0]
+        if not self._passi:
+            return self._id_base
+        prima, mosse = self._passi[-1]
+        return prima + len(mosse or ())
+
+    def aggiungi(self, delta: _Delta, tabellone: 'Tabellone',
+                 mosse: Optional[Sequence[Mossa]] = None) -> bool:
+        """
+        Aggiunge in coda il tabellone ottenuto applicando delta (cioè le mosse) all'ultimo,
+        poi applica la politica. Restituisce True se è stato copiato un checkpoint.
+        """
+        passo: Optional[Tuple[Mossa, ...]] = None if mosse is None else tuple(mosse)
+        ultimo: int = len(self) - 1
+        self._passi.append((self._id_passo(ultimo), passo))
+        self._delta.append(delta)
+        memoria_delta: int = _memoria_delta(delta)
+        memoria_passo: int = _memoria_passo(passo)
+        self._memoria_delta += memoria_delta
+        self._memoria_passi += memoria_passo
+        self._dall_checkpoint += memoria_delta + memoria_passo
+        politica: PoliticaStoria = self._politica
+        checkpoint: bool = (ultimo + 1 - max(self._checkpoint) >= politica.intervallo_checkpoint
+                            and self._dall_checkpoint >= tabellone.memoria(interi=False))
+        if checkpoint:
+            self._aggiungi_checkpoint(ultimo + 1, tabellone)
+        if politica.max_annullamenti is not None or politica.memoria_massima is not None:
+            checkpoint = self._applica_politica(tabellone) or checkpoint
+        return checkpoint
+
+    def _aggiungi_checkpoint(self, i: int, tabellone: 'Tabellone') -> None:
+        self._checkpoint[i] = type(tabellone).copia_tabellone(tabellone)
+        self._memoria_checkpoint[i] = self._checkpoint[i].memoria(interi=False)
+        self._dall_checkpoint = 0
+
+    def _applica_politica(self, ultimo: 'Tabellone') -> bool:
+        """Scarta la storia oltre i limiti della politica; True se copia un checkpoint."""
+        politica: PoliticaStoria = self._politica
+        if politica.max_annullamenti is not None:
+            self._dimentica_fino(self.primo)
+        limite: Optional[int] = politica.memoria_massima
+        if limite is None:
+            return False
+        # 1) Differenze più vecchie: si ricostruiscono rigiocando le mosse
+        while self.memoria_totale() > limite and self._esaminate < len(self._delta):
+            i: int = self._esaminate
+            delta: Optional[_Delta] = self._delta[i]
+            if delta is not None and self._passi[i][1] is not None:
+                self._memoria_delta -= _memoria_delta(delta)
+                self._delta[i] = None
+            self._esaminate += 1
+        # 2) Passi più vecchi, fino al checkpoint successivo
+        checkpoint: List[int] = sorted(self._checkpoint)
+        while self.memoria_totale() > limite and len(checkpoint) > 1:
+            checkpoint.pop(0)
+            self._dimentica_fino(checkpoint[0])
+        # 3) Resta un solo checkpoint: se ne prende uno nuovo sull'ultimo tabellone, ma solo
+        # quando quello che si scarta pesa almeno quanto la copia. Altrimenti con un limite
+        # più piccolo di un checkpoint si copierebbe il tabellone a ogni passo
+        passi: int = self._memoria_delta + self._memoria_passi
+        if (self.memoria_totale() > limite and self._delta
+                and passi >= sum(self._memoria_checkpoint.values())):
+            self._aggiungi_checkpoint(len(self) - 1, ultimo)
+            self._dimentica_fino(len(self) - 1)
+            return True
+        return False
+
+    def _dimentica_fino(self, i: int) -> None:
+        """Dimentica i passi prima dell'ultimo checkpoint che non segue i."""
+        nuova_base: int = max(k for k in self._checkpoint if k <= i)
+        n: int = nuova_base - self._base
+        if n <= 0:
+            return
+        self._id_base = self._id_passo(nuova_base)
+        for delta in self._delta[:n]:
+            if delta is not None:
+                self._memoria_delta -= _memoria_delta(delta)
+        for _, mosse in self._passi[:n]:
+            self._memoria_passi -= _memoria_passo(mosse)
+        del self._delta[:n]
+        del self._passi[:n]
+        for k in [k for k in self._checkpoint if k < nuova_base]:
+            del self._checkpoint[k]
+            del self._memoria_checkpoint[k]
+        self._esaminate = max(self._esaminate - n, 0)
+        self._base = nuova_base
+
+    def imposta_mine(self, tabellone: 'Tabellone') -> None:
+        """Copia nei checkpoint le mine appena piazzate su tabellone."""
+        for k, checkpoint in self._checkpoint.items():
+            checkpoint.imposta_mine_da(tabellone)
+            self._memoria_checkpoint[k] = checkpoint.memoria(interi=False)
+
+    def tronca(self, n: int) -> None:
+        """Mantiene solo i tabelloni fino a n (scarta le mosse annullate)."""
+        scartate: int = n - self._base
+        if scartate >= len(self._delta):
+            return
+        for delta in self._delta[scartate:]:
+            if delta is not None:
+                self._memoria_delta -= _memoria_delta(delta)
+        for _, mosse in self._passi[scartate:]:
+            self._memoria_passi -= _memoria_passo(mosse)
+        del self._delta[scartate:]
+        del self._passi[scartate:]
+        self._esaminate = min(self._esaminate, len(self._delta))
+        for k in [k for k in self._checkpoint if k > n]:
+            del self._checkpoint[k]
+            del self._memoria_checkpoint[k]
+        ultimo: int = max(self._checkpoint) - self._base
+        self._dall_checkpoint = (
+            sum(_memoria_delta(delta) for delta in self._delta[ultimo:] if delta is not None) +
+            sum(_memoria_passo(mosse) for _, mosse in self._passi[ultimo:]))
+
+    def memoria(self) -> Dict[str, int]:
+        """Stima in byte di checkpoint, differenze e mosse conservati."""
+        return {"checkpoint": sum(self._memoria_checkpoint.values()),
+                "differenze": self._memoria_delta, "mosse": self._memoria_passi}
+
+    def memoria_totale(self) -> int:
+        return sum(self._memoria_checkpoint.values()) + self._memoria_delta + self._memoria_passi
+
+
+class _VistaMosse(Mapping[int, Mossa]):
+    """Vista in sola lettura delle mosse conservate nell'evoluzione di una Partita."""
+    __slots__ = ('_partita',)
+
+    def __init__(self, partita: 'Partita') -> None:
+        self._partita: 'Partita' = partita
+
+    def __getitem__(self, id_mossa: int) -> Mossa:
+        mossa: Optional[Mossa] = self._partita._evoluzione.mossa(id_mossa)
+        if mossa is None:
+            raise KeyError(id_mossa)
+        return mossa
+
+    def __len__(self) -> int:
+        return sum(len(mosse or ()) for _, mosse in self._partita._evoluzione._passi)
+
+    def __iter__(self) -> Iterator[int]:
+        return (id_mossa for id_mossa, _ in self._partita._evoluzione.mosse())
+
 # ——————————————————————————————————————————————————————————————————————————————————————–————   
 class Partita:
-    def __init__(self, larghezza: int, altezza: int, n_mine: int):
+    # Storia conservata dalle partite di questa classe, se non indicata al costruttore
+    politica_storia: PoliticaStoria = PoliticaStoria()
+
+    def __init__(self, larghezza: int, altezza: int, n_mine: int, compatto: bool = False,
+                 seme: Union[int, random.Random, None] = None,
+                 disposizione: Optional[Iterable[int]] = None,
+                 politica_storia: Optional[PoliticaStoria] = None):
+        if not 0 <= n_mine <= larghezza * altezza:
+            raise ValueError("Il numero di mine non è compatibile con le dimensioni del tabellone.")
         self._larghezza: int = larghezza
         self._altezza: int = altezza
         self._n_mine: int = n_mine
+        self._compatto: bool = compatto  # tabellone a 1 byte per cella (vedi Tabellone)
+        # Con un seme intero lo stesso seme e lo stesso primo click danno lo stesso tabellone
+        self._seme: Optional[int] = seme if isinstance(seme, int) else None
+        self._rng: random.Random = seme if isinstance(seme, random.Random) else random.Random(seme)
         self._stato_corrente: int = 0  # 0 -> in corso, 1 -> successo, 2 -> fallimento
-        self._tabellone: 'Tabellone' = Tabellone(self)
-        self._evoluzione: List['Tabellone'] = [Tabellone.copia_tabellone(self.tabellone)]
-        # Dizionario per tracciare le mosse: chiave = mossa_id, valore = (r, c)
-        self._mosse: Dict[int, Tuple[int, int]] = {}
-        self._mossa_corrente: int = 0
+        self._strumentazione: Optional['Strumentazione'] = None  # vedi attiva_strumentazione
+        if politica_storia is not None:
+            self.politica_storia = politica_storia
+        self._tabellone: 'Tabellone' = self._nuovo_tabellone(disposizione)
+        # Tabelloni e mosse della partita: il passo i (una mossa o un blocco di mosse, vedi
+        # applica_mosse) porta da evoluzione[i] a evoluzione[i + 1]
+        self._evoluzione: _Storia = _Storia(self.tabellone, self.politica_storia)
+        self._mossa_corrente: int = 0  # indice in evoluzione del tabellone attuale
+        # Caselle cambiate dall'ultimo prelievo, None finché nessuno le preleva (vedi
+        # preleva_celle_modificate): senza un consumatore l'insieme non crescerebbe che
+        self._celle_modificate: Optional[Set[int]] = None
+        # Tupla e non lista: un osservatore può aggiungerne o toglierne durante una notifica
+        self._osservatori: Tuple[Callable[[str, Any], None], ...] = ()
           
+    def _nuovo_tabellone(self, disposizione: Optional[Iterable[int]]) -> 'Tabellone':
+        tabellone: 'Tabellone' = Tabellone(self)
+        if disposizione is not None:
+            # Mine già decise (es. partita registrata): niente piazzamento al primo click
+            mine: List[int] = list(disposizione)
+            if len(mine) != self.n_mine:
+                raise ValueError("La disposizione non contiene n_mine mine.")
+            tabellone.imposta_mine(mine)
+        return tabellone
+
     @property
     def larghezza(self) -> int:
         return self._larghezza
     
     @property
-    def mosse(self) -> Dict[int, Tuple[int, int]]:
-        return self._mosse
+    def mosse(self) -> Mapping[int, Mossa]:
+        """
+        Vista in sola lettura delle mosse dei passi conservati nell'evoluzione: id della
+        mossa -> Mossa. Segue la partita senza copiare nulla; dict(partita.mosse) per una copia.
+        """
+        return _VistaMosse(self)
     
     @property
     def altezza(self) -> int:
@@ -135,6 +1052,18 @@ class Partita:
     def n_mine(self) -> int:
         return self._n_mine
 
+    @property
+    def compatto(self) -> bool:
+        return self._compatto
+
+    @property
+    def seme(self) -> Optional[int]:
+        return self._seme
+
+    @property
+    def rng(self) -> random.Random:
+        return self._rng
+
     @property
     def stato_corrente(self) -> int:
         return self._stato_corrente
@@ -143,9 +1072,27 @@ class Partita:
     def stato_corrente(self, valore: int) -> None:
         self._stato_corrente = valore
         if valore == 2:
-            print("Game Over! Hai perso.")
+            self._notifica("messaggio", "Game Over! Hai perso.")
         elif valore == 1:
-            print("Congratulazioni! Hai vinto!")
+            self._notifica("messaggio", "Congratulazioni! Hai vinto!")
+
+    @property
+    def strumentazione(self) -> Optional['Strumentazione']:
+        return self._strumentazione
+
+    def attiva_strumentazione(self, strumentazione: Optional['Strumentazione'] = None) -> 'Strumentazione':
+        """
+        Misura da ora in poi le operazioni della partita e del suo tabellone, su
+        `strumentazione` (condivisibile tra più partite) o su una nuova, e la restituisce.
+        """
+        if strumentazione is None:
+            from strumentazione import Strumentazione
+            strumentazione = Strumentazione()
+        self._strumentazione = self._tabellone.strumentazione = strumentazione
+        return strumentazione
+
+    def disattiva_strumentazione(self) -> None:
+        self._strumentazione = self._tabellone.strumentazione = None
             
     @property
     def tabellone(self) -> 'Tabellone':
@@ -156,19 +1103,79 @@ class Partita:
         self._tabellone = tab
     
     @property
-    def evoluzione(self) -> List['Tabellone']:
+    def evoluzione(self) -> Sequence['Tabellone']:
         return self._evoluzione
     
     @evoluzione.setter
-    def evoluzione(self, valore: list['Tabellone']) -> None:
-        self._evoluzione = valore
+    def evoluzione(self, valore: Sequence['Tabellone']) -> None:
+        self._evoluzione = _Storia.da_tabelloni(valore)
         
-    def _aggiorna_evoluzione(self) -> None:
-        if len(self.evoluzione) == 0 or self.evoluzione[-1] != self.tabellone:
-            copia_tabellone: 'Tabellone' = self.tabellone.copia_tabellone(self.tabellone)
-            self.evoluzione.append(copia_tabellone)
+    def _aggiorna_evoluzione(self, mosse: Sequence[Mossa]) -> _Delta:
+        """
+        Registra le mosse appena eseguite come nuovo passo dell'evoluzione, con le modifiche
+        come differenza e senza copiare il tabellone. Le mosse annullate si scartano.
+        """
+        strumentazione = self._strumentazione
+        inizio: int = strumentazione.inizio() if strumentazione is not None else 0
+        delta: _Delta = self.tabellone.preleva_modifiche()
+        self._segnala_modifiche(delta)
+        self._evoluzione.tronca(self._mossa_corrente)
+        checkpoint: bool = self._evoluzione.aggiungi(delta, self.tabellone, mosse)
+        self._mossa_corrente += 1
+        if strumentazione is not None:
+            strumentazione.conta("byte_evoluzione",
+                                 sys.getsizeof(delta.scoperte) + sys.getsizeof(delta.segnate))
+            strumentazione.conta("checkpoint", checkpoint)
+            strumentazione.registra("evoluzione", inizio)
+        return delta
+
+    def memoria(self) -> Dict[str, int]:
+        """
+        Stima in byte della memoria della partita: tabellone corrente, checkpoint,
+        differenze e mosse dell'evoluzione, e il totale. Con memoria_massima nella
+        politica_storia la parte dell'evoluzione resta entro il limite.
+        """
+        memoria: Dict[str, int] = {"tabellone": self._tabellone.memoria(), **self._evoluzione.memoria()}
+        memoria["totale"] = sum(memoria.values())
+        return memoria
+
+    def _segnala_modifiche(self, delta: _Delta) -> None:
+        celle: Optional[Set[int]] = self._celle_modificate
+        if celle is not None:
+            celle.update(delta.scoperte)
+            celle.update(delta.segnate)
+
+    def preleva_celle_modificate(self) -> Set[int]:
+        """
+        Restituisce gli indici delle caselle cambiate (scoperte, segnate o tornate coperte)
+        da scopriCasella, segna_casella e muovi_mossa dall'ultimo prelievo, e azzera l'insieme.
+        Permette di ridisegnare solo le caselle cambiate invece di tutto il tabellone.
+        Le caselle si raccolgono solo dal primo prelievo in poi: la prima chiamata
+        restituisce un insieme vuoto e va fatta dopo aver disegnato tutto il tabellone.
+        """
+        celle: Set[int] = self._celle_modificate if self._celle_modificate is not None else set()
+        self._celle_modificate = set()
+        return celle
+
+    def aggiungi_osservatore(self, osservatore: Callable[[str, Any], None]) -> None:
+        """
+        Registra una funzione chiamata come osservatore(evento, dati) a ogni evento:
+        "mossa" (dati: la Mossa appena eseguita, compresi avanti/indietro), "mosse" (dati:
+        tupla delle Mossa eseguite in blocco da applica_mosse), "reset" e "messaggio"
+        (dati: testo per il giocatore, es. fine partita o mossa non valida).
+        La partita non scrive mai su stdout: chi vuole i messaggi registra un osservatore.
+        """
+        self._osservatori += (osservatore,)
+
+    def rimuovi_osservatore(self, osservatore: Callable[[str, Any], None]) -> None:
+        osservatori: List[Callable[[str, Any], None]] = list(self._osservatori)
+        osservatori.remove(osservatore)
+        self._osservatori = tuple(osservatori)
+
+    def _notifica(self, evento: str, dati: Any = None) -> None:
+        for osservatore in self._osservatori:
+            osservatore(evento, dati)
 
-    
     def segna_casella(self, r: int, c: int) -> None:
         if self.stato_corrente != 0:
             raise RuntimeError("La partita non è in corso.")
@@ -176,10 +1183,13 @@ class Partita:
             raise ValueError("La casella è già scoperta.")
         
         # Aggiungi la mossa al dizionario delle mosse
-        self.mosse[self._mossa_corrente] = (r, c)
+        strumentazione = self._strumentazione
+        inizio: int = strumentazione.inizio() if strumentazione is not None else 0
         self.tabellone.segna_casella(r, c)
-        self._aggiorna_evoluzione()
-        self._mossa_corrente += 1
+        self._aggiorna_evoluzione((Mossa(r, c, AZIONE_SEGNA),))
+        if strumentazione is not None:
+            strumentazione.registra("segna", inizio)
+        self._notifica("mossa", Mossa(r, c, AZIONE_SEGNA))
             
     def get_casella_segnata(self, r: int, c: int) -> bool:
         return self.tabellone.is_segnata(r, c)
@@ -192,32 +1202,125 @@ class Partita:
         if not self.tabellone.is_coperta(r, c):
             raise ValueError("La casella è già scoperta.")
             
+        strumentazione = self._strumentazione
+        inizio: int = strumentazione.inizio() if strumentazione is not None else 0
         idx: int = self.tabellone.get_idx(r, c)
-        self.mosse[self._mossa_corrente] = (r, c)
-        self._mossa_corrente += 1
+        if not self.tabellone.mine_piazzate:
+            self._piazza_mine(idx)
         
-        if idx in self.tabellone.mine:
-            self.tabellone.scopri_casella(r, c)
+        self._scopri(idx)
+        self._aggiorna_evoluzione((Mossa(r, c, AZIONE_SCOPRI),))
+        self._verifica_vittoria()
+        if strumentazione is not None:
+            strumentazione.registra("scopri", inizio)
+        self._notifica("mossa", Mossa(r, c, AZIONE_SCOPRI))
+
+    def scopri_vicini(self, r: int, c: int) -> Set[int]:
+        """
+        "Accordo": se attorno alla casella scoperta (r, c) ci sono tante caselle segnate
+        quante mine adiacenti, scopre tutti gli altri vicini coperti. Se i contrassegni
+        sono sbagliati si scopre una mina e la partita è persa. È una sola mossa
+        (AZIONE_SCOPRI_VICINI); restituisce le caselle cambiate.
+        """
+        return self.applica_mosse([Mossa(r, c, AZIONE_SCOPRI_VICINI)])
+
+    def applica_mosse(self, mosse: Iterable[Mossa]) -> Set[int]:
+        """
+        Esegue in blocco mosse AZIONE_SCOPRI, AZIONE_SEGNA e AZIONE_SCOPRI_VICINI, per
+        esempio tutte le deduzioni di un risolutore. Le mosse vengono validate tutte prima
+        di modificare il tabellone (un ValueError non cambia nulla), poi eseguite in
+        ordine come un unico passo dell'evoluzione, annullabile con una sola
+        muovi_mossa("indietro"), con un solo controllo di vittoria alla fine.
+
+        Una casella da scoprire o segnare che una mossa precedente del blocco ha già
+        scoperto (per esempio perché nella stessa regione) viene saltata; se si scopre
+        una mina le mosse successive non vengono eseguite. In mosse restano solo le
+        mosse eseguite. Restituisce le caselle cambiate.
+        """
+        if self.stato_corrente != 0:
+            raise RuntimeError("La partita non è in corso.")
+        lotto: List[Mossa] = [Mossa(*mossa) for mossa in mosse]
+        self._valida_lotto(lotto)
+        if not lotto:
+            return set()
+        strumentazione = self._strumentazione
+        inizio: int = strumentazione.inizio() if strumentazione is not None else 0
+        t = self._tabellone
+        eseguite: List[Mossa] = []
+        for mossa in lotto:
+            idx: int = t.get_idx(mossa.riga, mossa.colonna)
+            if mossa.azione == AZIONE_SCOPRI_VICINI:
+                for j in t.vicini(idx):
+                    if j not in t.scoperte and j not in t.segnate and self.stato_corrente == 0:
+                        self._scopri(j)
+            elif idx in t.scoperte:
+                continue
+            elif mossa.azione == AZIONE_SEGNA:
+                t.segna_casella(mossa.riga, mossa.colonna)
+            else:
+                if not t.mine_piazzate:
+                    self._piazza_mine(idx)
+                self._scopri(idx)
+            eseguite.append(mossa)
+            if self.stato_corrente != 0:
+                break
+        delta: _Delta = self._aggiorna_evoluzione(eseguite)
+        self._verifica_vittoria()
+        if strumentazione is not None:
+            strumentazione.conta("mosse_in_blocco", len(eseguite))
+            strumentazione.registra("blocco", inizio)
+        self._notifica("mosse", tuple(eseguite))
+        return set(delta.scoperte).union(delta.segnate)
+
+    def _valida_lotto(self, lotto: List[Mossa]) -> None:
+        """Solleva ValueError se una mossa del lotto non è eseguibile, tenendo conto dei
+        contrassegni cambiati dalle mosse precedenti del lotto stesso."""
+        t = self._tabellone
+        invertite: Set[int] = set()  # contrassegni invertiti dal lotto fin qui
+        for r, c, azione in lotto:
+            if not (0 <= r < self.altezza and 0 <= c < self.larghezza):
+                raise ValueError(f"La casella ({r}, {c}) è fuori dal tabellone.")
+            idx: int = t.get_idx(r, c)
+            if azione == AZIONE_SEGNA:
+                if idx in t.scoperte:
+                    raise ValueError("La casella è già scoperta.")
+                invertite ^= {idx}
+            elif azione == AZIONE_SCOPRI:
+                if idx in t.scoperte:
+                    raise ValueError("La casella è già scoperta.")
+                if (idx in t.segnate) != (idx in invertite):
+                    raise ValueError("La casella è segnata come mina.")
+            elif azione == AZIONE_SCOPRI_VICINI:
+                if idx not in t.scoperte or idx in t.mine:
+                    raise ValueError("Si scoprono i vicini solo di una casella numerata scoperta.")
+                segnate: int = sum((j in t.segnate) != (j in invertite) for j in t.vicini(idx))
+                if segnate != t.mine_adiacenti_cache[idx]:
+                    raise ValueError("Le caselle segnate attorno non corrispondono alle mine adiacenti.")
+            else:
+                raise ValueError(f"Azione non eseguibile in blocco: {azione}.")
+
+    def _scopri(self, idx: int) -> None:
+        """Scopre la casella idx: con una mina la partita è persa, altrimenti tutta la regione."""
+        if _scopri_su(self._tabellone, idx):
             self.stato_corrente = 2  # Partita terminata senza successo
 
-        else:
-            self._scopri_ricorsivo(r, c)
-            self._aggiorna_evoluzione()
-            
-        # Verifica le condizioni di vittoria
-        celle_totali = self.tabellone.righe * self.tabellone.colonne
-        num_mine = len(self.tabellone.mine)
-        num_celle_scoperte = len(self.tabellone.scoperte)
-        # Verifica se tutte le mine sono segnate correttamente
-        mine_segnate = len(self.tabellone.segnate)
-        
-        if mine_segnate == num_mine and num_celle_scoperte == (celle_totali - num_mine):
+    def _verifica_vittoria(self) -> None:
+        # Restano da scoprire solo caselle con mine (non serve averle segnate, come da specifica)
+        t = self.tabellone
+        if self.stato_corrente == 0 and len(t.scoperte) == t.righe * t.colonne - len(t.mine):
             self.stato_corrente = 1  # Partita terminata con successo
-            print("Vittoria!")
-                    
-         
-        
+
     
+    def _piazza_mine(self, idx: int) -> None:
+        """Piazza le mine al primo click lasciando libere la casella e, se possibile, i vicini."""
+        celle_totali: int = self.altezza * self.larghezza
+        esclusi: List[int] = [idx, *self.tabellone.vicini(idx)]
+        if celle_totali - len(esclusi) < self.n_mine:
+            esclusi = [idx] if celle_totali - 1 >= self.n_mine else []
+        self.tabellone.piazza_mine(self.n_mine, esclusi, self._rng)
+        # Le mine valgono per tutta la partita: anche i tabelloni già salvati le ricevono
+        self._evoluzione.imposta_mine(self.tabellone)
+
     def get_mine_adiacenti(self, r: int, c: int) -> int:
         idx: int = self.tabellone.get_idx(r, c)
         return self.tabellone.mine_adiacenti_cache[idx]
@@ -230,35 +1333,56 @@ class Partita:
         return self.tabellone.is_coperta(riga, colonna)
 
     def __str__(self) -> str:
-        result: List[str] = []
-        result.append("Tabellone iniziale:")
-        result.append(str(self.evoluzione[0])) 
-        # Aggiungere l'evoluzione della partita
-        for i, tabellone in enumerate(self.evoluzione[1:], 1):
-            if i <= len(self.mosse):  
-                mossa: tuple[int, int] = self.mosse[i-1]  # Ottieni la mossa che ha portato a questo stato
-                result.append(f"Tabellone a seguito della mossa di riga {mossa[0]} e colonna {mossa[1]}:")
-            result.append(str(tabellone)) 
-        return "\n".join(result)
+        return "\n".join(self.righe_testo())
+
+    def righe_testo(self) -> Iterator[str]:
+        """
+        Evoluzione della partita riga per riga: intestazione di ogni tabellone seguita
+        dalle sue righe. I tabelloni vengono ricostruiti uno alla volta sullo stesso
+        tabellone di lavoro, quindi la memoria non cresce con la lunghezza della partita.
+        """
+        primo: int = self._evoluzione.primo
+        if primo == 0:
+            yield "Tabellone iniziale:"
+        else:
+            yield f"Tabellone dopo {primo} passi (i precedenti non sono più conservati):"
+        for i, tabellone in enumerate(self._evoluzione.scorri(), start=primo):
+            if i > primo:
+                # Ottieni la mossa (o la prima delle mosse) che ha portato a questo stato
+                _, mosse = self._evoluzione.passo(i - 1)
+                if mosse:
+                    mossa: Mossa = mosse[0]
+                    if len(mosse) == 1:
+                        yield f"Tabellone a seguito della mossa di riga {mossa[0]} e colonna {mossa[1]}:"
+                    else:
+                        yield (f"Tabellone a seguito di {len(mosse)} mosse, la prima di riga "
+                               f"{mossa[0]} e colonna {mossa[1]}:")
+            yield from tabellone.righe_testo()
+
+    def scrivi_su(self, flusso: TextIO) -> None:
+        """Scrive l'evoluzione della partita su un flusso di testo, una riga alla volta."""
+        strumentazione = self._strumentazione
+        inizio: int = strumentazione.inizio() if strumentazione is not None else 0
+        for riga in self.righe_testo():
+            flusso.write(riga)
+            flusso.write("\n")
+        if strumentazione is not None:
+            strumentazione.registra("render", inizio)
      
      
     """ Metodi aggiungtivi """
     
     def _scopri_ricorsivo(self, r: int, c: int) -> None:
+        """
+        Scopre la casella e, se sicura, tutte quelle raggiungibili secondo le regole del
+        gioco. Nonostante il nome non c'è ricorsione: vedi Tabellone.scopri_regione.
+        """
         if not (0 <= r < self.altezza and 0 <= c < self.larghezza):
             return
         if not self._tabellone.is_coperta(r, c):
             return
+        self._tabellone.scopri_regione(self.tabellone.get_idx(r, c))
 
-        idx: int = self.tabellone.get_idx(r, c)
-
-        self._tabellone.scopri_casella(r, c)
-        if self.tabellone.mine_adiacenti_cache[idx] == 0:
-            for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                rr, cc = r + dr, c + dc
-                if 0 <= rr < self.tabellone.righe and 0 <= cc < self.tabellone.colonne:
-                    self._scopri_ricorsivo(rr, cc)
-                        
     def visualizza_mine(self) -> None:
         for riga in range(self.altezza):
             for colonna in range(self.larghezza):
@@ -266,28 +1390,45 @@ class Partita:
                     self.tabellone.scopri_casella(riga, colonna)  
                     # posso anche aggiungere un'altra logica per mostrare le mine in modo visivo
     
-    def reset(self) -> None:
+    def reset(self, disposizione: Optional[Iterable[int]] = None) -> None:
+        """Nuova partita con le stesse dimensioni; disposizione come nel costruttore."""
+        tabellone: 'Tabellone' = self._nuovo_tabellone(disposizione)
         self.stato_corrente: int = 0  # Ripristina lo stato a "in corso"
-        self.tabellone = Tabellone(self)  # Crea un nuovo tabellone
-        self.evoluzione = [Tabellone.copia_tabellone(self.tabellone)]  # Ripristina l'evoluzione
-        self._mosse = {}
-        self.mossa_corrente = 0  
+        self.tabellone = tabellone  # Crea un nuovo tabellone
+        self._evoluzione = _Storia(self.tabellone, self.politica_storia)  # Ripristina l'evoluzione
+        self._mossa_corrente = 0  
+        if self._celle_modificate is not None:
+            self._celle_modificate = set()
+        # Il generatore è andato avanti: il seme non descrive più il nuovo tabellone
+        self._seme = None
+        self._notifica("reset")
     
     def muovi_mossa(self, direzione: str) -> None:
         if self.stato_corrente != 0:
-            print("La partita è terminata. Non puoi modificare il tabellone.")
+            self._notifica("messaggio", "La partita è terminata. Non puoi modificare il tabellone.")
             return
+        strumentazione = self._strumentazione
+        inizio: int = strumentazione.inizio() if strumentazione is not None else 0
+        # Le modifiche non registrate (es. visualizza_mine) non fanno parte dell'evoluzione
+        pendenti: _Delta = self._tabellone.preleva_modifiche()
+        self._tabellone.applica_delta(pendenti, inverso=True)
+        self._segnala_modifiche(pendenti)
         if direzione == "avanti" and self._mossa_corrente < len(self._evoluzione) - 1:
+            delta: _Delta = self._evoluzione.delta(self._mossa_corrente)
+            self._tabellone.applica_delta(delta)
             self._mossa_corrente += 1
-            self._tabellone = Tabellone.copia_tabellone(self._evoluzione[self._mossa_corrente])
 
-        elif direzione == "indietro" and self._mossa_corrente > 0:
+        elif direzione == "indietro" and self._mossa_corrente > self._evoluzione.primo:
             self._mossa_corrente -= 1
-            self._tabellone = Tabellone.copia_tabellone(self._evoluzione[self._mossa_corrente])
+            delta = self._evoluzione.delta(self._mossa_corrente)
+            self._tabellone.applica_delta(delta, inverso=True)
         else:
-            print("Mossa non valida o non disponibile.")
+            self._notifica("messaggio", "Mossa non valida o non disponibile.")
             return
-        print(f"Mossa {direzione} eseguita. Stato attuale: {self._mossa_corrente + 1}")
+        self._segnala_modifiche(delta)
+        if strumentazione is not None:
+            strumentazione.registra("ripeti" if direzione == "avanti" else "annulla", inizio)
+        self._notifica("mossa", Mossa(0, 0, AZIONE_AVANTI if direzione == "avanti" else AZIONE_INDIETRO))
 
 def test():
     partita = Partita(larghezza=8, altezza=5, n_mine=24)
@@ -295,4 +1436,6 @@ def test():
     partita.scopriCasella(4, 4)
     partita.scopriCasella(1, 1)
     print(partita)
-test()
\ No newline at end of file
+
+if __name__ == "__main__":
+    test()
\ No newline at end of file
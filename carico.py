@@ -0,0 +1,141 @@
+"""
+Generatore di carico per server.py.
+
+Apre molte connessioni contemporanee; su ognuna un giocatore casuale gioca partite una
+dopo l'altra (scopre, segna, annulla, chiede lo stato) fino allo scadere della durata.
+Ogni richiesta aspetta la sua risposta, quindi la latenza misurata è il tempo di andata
+e ritorno. Alla fine riporta richieste al secondo e latenze p50/p99.
+
+Esempio:
+    python server.py --porta 8765 &
+    python carico.py --porta 8765 --connessioni 200 --durata 10
+"""
+from typing import Any, Dict, List, Optional, Set
+import argparse
+import asyncio
+import json
+import random
+import time
+
+
+class Misure:
+    def __init__(self) -> None:
+        self.latenze: List[float] = []  # secondi, una per richiesta
+        self.errori: int = 0
+        self.partite: int = 0
+
+    def riepilogo(self, secondi: float) -> Dict[str, float]:
+        latenze: List[float] = sorted(self.latenze)
+
+        def quantile(q: float) -> float:
+            return latenze[min(len(latenze) - 1, int(q * len(latenze)))] * 1000 if latenze else 0.0
+
+        return {
+            "richieste": len(latenze),
+            "errori": self.errori,
+            "partite": self.partite,
+            "richieste_al_secondo": len(latenze) / secondi if secondi else 0.0,
+            "p50_ms": quantile(0.50),
+            "p99_ms": quantile(0.99),
+            "massimo_ms": latenze[-1] * 1000 if latenze else 0.0,
+        }
+
+
+async def _giocatore(args: argparse.Namespace, rng: random.Random, misure: Misure,
+                     fine: float) -> None:
+    if args.unix:
+        reader, writer = await asyncio.open_unix_connection(args.unix, limit=1 << 24)
+    else:
+        reader, writer = await asyncio.open_connection(args.host, args.porta, limit=1 << 24)
+
+    async def richiesta(dati: Dict[str, Any]) -> Dict[str, Any]:
+        inizio: float = time.perf_counter()
+        writer.write(json.dumps(dati).encode() + b"\n")
+        risposta: Dict[str, Any] = json.loads(await reader.readline())
+        misure.latenze.append(time.perf_counter() - inizio)
+        if not risposta["ok"]:
+            misure.errori += 1
+        return risposta
+
+    try:
+        while time.perf_counter() < fine:
+            nuova = await richiesta({"cmd": "new", "larghezza": args.larghezza,
+                                     "altezza": args.altezza, "mine": args.mine,
+                                     "seme": rng.randrange(1 << 32)})
+            if not nuova["ok"]:
+                break
+            misure.partite += 1
+            sessione: str = nuova["sessione"]
+            # Ciò che il giocatore sa del tabellone, aggiornato con le caselle cambiate
+            coperte: Set[int] = set(range(args.larghezza * args.altezza))
+            segnate: Set[int] = set()
+            stato: int = 0
+            while stato == 0 and time.perf_counter() < fine:
+                libere: List[int] = list(coperte - segnate)
+                if not libere:
+                    break
+                scelta: float = rng.random()
+                if scelta < 0.70:
+                    r, c = divmod(rng.choice(libere), args.larghezza)
+                    dati: Dict[str, Any] = {"cmd": "reveal", "riga": r, "colonna": c}
+                elif scelta < 0.85:
+                    r, c = divmod(rng.choice(list(coperte)), args.larghezza)
+                    dati = {"cmd": "flag", "riga": r, "colonna": c}
+                elif scelta < 0.95:
+                    dati = {"cmd": "undo"}
+                else:
+                    dati = {"cmd": "state"}
+                dati["sessione"] = sessione
+                risposta = await richiesta(dati)
+                stato = risposta.get("stato", stato)
+                for r, c, carattere in risposta.get("celle", ()):
+                    idx: int = r * args.larghezza + c
+                    if carattere in "CD":
+                        coperte.add(idx)
+                        if carattere == "D":
+                            segnate.add(idx)
+                        else:
+                            segnate.discard(idx)
+                    else:
+                        coperte.discard(idx)
+                        segnate.discard(idx)
+    finally:
+        writer.close()
+
+
+async def esegui(args: argparse.Namespace) -> Dict[str, float]:
+    misure = Misure()
+    inizio: float = time.perf_counter()
+    fine: float = inizio + args.durata
+    await asyncio.gather(*(_giocatore(args, random.Random(f"{args.seme}:{i}"), misure, fine)
+                           for i in range(args.connessioni)))
+    return misure.riepilogo(time.perf_counter() - inizio)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generatore di carico per server.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--unix", help="percorso del socket Unix del server")
+    parser.add_argument("--connessioni", type=int, default=100)
+    parser.add_argument("--durata", type=float, default=10.0, help="secondi")
+    parser.add_argument("--larghezza", type=int, default=16)
+    parser.add_argument("--altezza", type=int, default=16)
+    parser.add_argument("--mine", type=int, default=40)
+    parser.add_argument("--seme", type=int, default=0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    risultati = asyncio.run(esegui(args))
+    if args.json:
+        print(json.dumps(risultati))
+    else:
+        print(f"richieste={risultati['richieste']} errori={risultati['errori']} "
+              f"partite={risultati['partite']} "
+              f"richieste/s={risultati['richieste_al_secondo']:.0f} "
+              f"p50={risultati['p50_ms']:.2f} ms p99={risultati['p99_ms']:.2f} ms "
+              f"max={risultati['massimo_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# I moduli del progetto stanno nella cartella principale: pytest la aggiunge a sys.path
@@ -1,8 +1,24 @@
+import time
 from ezgraphics import GraphicsWindow
-from campo_minato import Partita
+from campo_minato import Partita, AZIONE_INDIETRO, AZIONE_AVANTI
 class Gui:
-    def __init__(self, p:'Partita'):
+    # Dizionario colori per ogni numero di mine adiacenti
+    COLORI_MINE = {
+        1: "blue",
+        2: "green",
+        3: "red",
+        4: "purple",
+        5: "maroon",
+        6: "turquoise",
+        7: "black",
+        8: "gray"
+    }
+
+    def __init__(self, p:'Partita', scorta=None):
         self.partita = p
+        self.scorta = scorta  # ScortaTabelloni opzionale: nuove partite senza tentativi
+        self.ultimo_frame_ms = 0.0  # durata dell'ultimo ridisegno del tabellone
+        self.ultimo_frame_celle = 0  # caselle ridisegnate nell'ultimo frame
         win_width = 600
         win_height = 600
         self.square_size = min(win_width // self.partita.larghezza, (win_height - 60) // self.partita.altezza)
@@ -32,6 +48,8 @@ class Gui:
             width = button_width_large if label in ["New", "Esci"] else button_width_small
             self.menu_buttons[label] = (x_position, self.window_height - 50, width, button_height)
             x_position += width + space_between
+        # La partita non stampa nulla: i suoi messaggi arrivano come eventi
+        self.partita.aggiungi_osservatore(self._stampa_evento)
         self.win.enableEvents("MouseDown", "KeyPress")
         self.win.setEventHandler(self._gestisci_eventi)
 
@@ -56,50 +74,76 @@ class Gui:
         self.canvas.setTextAnchor("center")
             
     def reset_partita(self):
-        self.partita.reset()  # Chiama il metodo di reset della partita
+        # Tabellone risolvibile dalla scorta se ce n'è uno pronto, altrimenti reset normale
+        if self.scorta is None or not self.scorta.applica(self.partita):
+            self.partita.reset()  # Chiama il metodo di reset della partita
         self._disegna_tabellone()  # Riutilizza il reset senza ridondanza
         self._disegna_menu()
         
-    def _disegna_tabellone(self):
-        self.canvas.clear()
+    def _stampa_evento(self, evento, dati):
+        if evento == "messaggio":
+            print(dati)
+        elif evento == "mossa" and dati.azione in (AZIONE_INDIETRO, AZIONE_AVANTI):
+            direzione = "avanti" if dati.azione == AZIONE_AVANTI else "indietro"
+            print(f"Mossa {direzione} eseguita.")
+
+    def _prepara_canvas(self):
         self.canvas.setFontSize(20)
         self.canvas.setColor("black")
         self.canvas.setLineStyle("solid")
         self.canvas.setTextAnchor("center")
+
+    def _disegna_tabellone(self):
+        """Ridisegno completo: usato all'avvio, per New e a fine partita."""
+        inizio = time.perf_counter_ns()
+        self.canvas.clear()
+        self._prepara_canvas()
         for row in range(self.partita.altezza):
             for col in range(self.partita.larghezza):
-                x = col * self.square_size
-                y = row * self.square_size
-                state = self._get_cell_state(row, col)
-                self.canvas.setFill(state)
-                self.canvas.drawRect(x, y, self.square_size, self.square_size)
-                # Number of adjacents
-                if state == "white" and self.partita.get_mine_adiacenti(row, col):
-                    text = str(self.partita.get_mine_adiacenti(row, col))
-                    text_x = x + (self.square_size // 2)
-                    text_y = y + (self.square_size // 2)
-                    # Dizionario colori per ogni numero di mine adiacenti
-                    colori_mine = {
-                    1: "blue",
-                    2: "green",
-                    3: "red",
-                    4: "purple",
-                    5: "maroon",
-                    6: "turquoise",
-                    7: "black",
-                    8: "gray"
-                    }
-
-                    # Ottieni il colore dal dizionario (default a nero se non trovato)
-                    num_mine = self.partita.get_mine_adiacenti(row, col)
-                    colore_testo = colori_mine.get(num_mine, "black")
-
-                    # Imposta il colore e disegna il testo
-                    self.canvas.setOutline(colore_testo)
-                    self.canvas.drawText(text_x, text_y, text)
-                    self.canvas.setColor("black")
-
+                self._disegna_cella(row, col)
+        # Il tabellone è tutto aggiornato: le modifiche in sospeso non servono più
+        self.partita.preleva_celle_modificate()
         self._disegna_menu()
+        self._riporta_frame(self.partita.altezza * self.partita.larghezza, inizio)
+
+    def _aggiorna_tabellone(self):
+        """Ridisegna solo le caselle cambiate dall'ultimo frame."""
+        inizio = time.perf_counter_ns()
+        celle = self.partita.preleva_celle_modificate()
+        self._prepara_canvas()
+        for idx in celle:
+            row, col = divmod(idx, self.partita.larghezza)
+            self._disegna_cella(row, col)
+        self._riporta_frame(len(celle), inizio)
+
+    def _riporta_frame(self, n_celle, inizio):
+        """Salva durata e caselle del frame; con la strumentazione attiva lo registra come "render"."""
+        self.ultimo_frame_ms = (time.perf_counter_ns() - inizio) / 1e6
+        self.ultimo_frame_celle = n_celle
+        strumentazione = self.partita.strumentazione
+        if strumentazione is not None:
+            strumentazione.registra("render", inizio)
+            strumentazione.conta("celle_disegnate", n_celle)
+
+    def _disegna_cella(self, row, col):
+        x = col * self.square_size
+        y = row * self.square_size
+        state = self._get_cell_state(row, col)
+        self.canvas.setFill(state)
+        self.canvas.drawRect(x, y, self.square_size, self.square_size)
+        # Number of adjacents
+        if state == "white":
+            num_mine = self.partita.get_mine_adiacenti(row, col)
+            if num_mine:
+                text_x = x + (self.square_size // 2)
+                text_y = y + (self.square_size // 2)
+                # Ottieni il colore dal dizionario (default a nero se non trovato)
+                colore_testo = self.COLORI_MINE.get(num_mine, "black")
+
+                # Imposta il colore e disegna il testo
+                self.canvas.setOutline(colore_testo)
+                self.canvas.drawText(text_x, text_y, str(num_mine))
+                self.canvas.setColor("black")
     
     def _visualizza_game_over(self):
         self._disegna_tabellone()
@@ -144,10 +188,10 @@ class Gui:
                     self.win.close()
                 elif text == "↩︎":
                     self.partita.muovi_mossa("indietro")  # Chiamato il metodo per muovere indietro
-                    self._disegna_tabellone()  # Rendi il nuovo stato del tabellone visibile
+                    self._aggiorna_tabellone()  # Rendi il nuovo stato del tabellone visibile
                 elif text == "↪︎":
                     self.partita.muovi_mossa("avanti")  # Chiamato il metodo per muovere avanti
-                    self._disegna_tabellone()
+                    self._aggiorna_tabellone()
                 return
         
         if not (0 <= row < self.partita.altezza and 0<= col < self.partita.larghezza):
@@ -175,7 +219,7 @@ class Gui:
                     self._visualizza_vittoria()
                     self.win.wait() 
 
-                self._disegna_tabellone()
+                self._aggiorna_tabellone()
 
     def _gestisci_click_destro(self, row, col):
         if self.partita.is_coperta(row, col):  # Verifica che la casella sia ancora coperta
@@ -183,7 +227,7 @@ class Gui:
                 self.partita.segna_casella(row, col)  # Usa segna_casella che rimuove la segnatura
             else:
                 self.partita.segna_casella(row, col)  # Usa segna_casella per aggiungere la segnatura
-            self._disegna_tabellone()  
+            self._aggiorna_tabellone()  
             
     def _gestisci_tasto(self, event):
         if event.keycode == 889192475:
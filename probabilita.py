@@ -0,0 +1,246 @@
+"""
+Probabilità esatte di mina per ogni casella coperta di un Tabellone.
+
+Il Risolutore pesa allo stesso modo le configurazioni di ogni componente della frontiera
+e stima le caselle interne con una media; qui invece ogni configurazione della frontiera
+con s mine vale comb(interne, mine_rimaste - s), cioè il numero di modi di piazzare le
+mine rimanenti tra le caselle interne. Il risultato è la probabilità esatta rispetto al
+numero totale di mine, con gli stessi vincoli del Risolutore (contrassegni = mine).
+
+Il calcolo procede così:
+
+1. propagazione dei vincoli e divisione in componenti indipendenti (risolutore.py);
+2. enumerazione delle componenti nuove in un pool di processi: quelle grandi vengono
+   divise in rami fissando le caselle più vincolate, così anche una frontiera fatta di
+   un'unica componente lunga usa tutti i processi;
+3. combinazione con interi esatti: convoluzione delle distribuzioni del numero di mine
+   di tutte le componenti tranne una, pesata con i coefficienti binomiali delle interne.
+
+Le enumerazioni sono memorizzate per firma della componente (vincoli rinumerati in ordine
+di casella), quindi posizioni ripetute o componenti uguali in punti diversi del tabellone
+non vengono rienumerate.
+
+Esempio:
+    with MotoreProbabilita(processi=8) as motore:
+        soluzione = motore.calcola(partita.tabellone, partita.n_mine)
+        soluzione.probabilita_di(idx)
+"""
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import product
+from math import comb
+from typing import Dict, List, Optional, Sequence, Tuple
+import os
+
+from campo_minato import Tabellone
+from risolutore import Enumerazione, Soluzione, Vincolo, componenti, enumera, propaga, vincolo
+
+# Componente rinumerata: vincoli (caselle locali 0..n-1, mine) in ordine
+Firma = Tuple[Tuple[Tuple[int, ...], int], ...]
+# Enumerazione con caselle locali: k -> (configurazioni, configurazioni minate per casella)
+EnumerazioneLocale = Dict[int, Tuple[int, Tuple[int, ...]]]
+
+
+def firma(componente: Sequence[Vincolo]) -> Tuple[Firma, List[int]]:
+    """Firma della componente e caselle del tabellone nell'ordine dei numeri locali."""
+    celle: List[int] = sorted(set().union(*(c for c, _ in componente)))
+    locale: Dict[int, int] = {idx: i for i, idx in enumerate(celle)}
+    vincoli: Firma = tuple(sorted((tuple(sorted(locale[idx] for idx in c)), n)
+                                  for c, n in componente))
+    return vincoli, celle
+
+
+def enumera_firma(vincoli: Firma, fissate: Sequence[Tuple[int, int]] = ()) -> EnumerazioneLocale:
+    """
+    Enumera le configurazioni della componente con le caselle locali `fissate` (casella,
+    0 o 1) già assegnate: l'unione dei rami con tutte le assegnazioni possibili è
+    l'enumerazione completa.
+    """
+    n_celle: int = 1 + max(max(c) for c, _ in vincoli)
+    componente: List[Vincolo] = [(frozenset(c), n) for c, n in vincoli]
+    componente += [(frozenset((i,)), mina) for i, mina in fissate]
+    enumerazione: Enumerazione = enumera(componente)
+    return {k: (conteggio, tuple(per_cella.get(i, 0) for i in range(n_celle)))
+            for k, (conteggio, per_cella) in enumerazione.items()}
+
+
+def _unisci(rami: Sequence[EnumerazioneLocale]) -> EnumerazioneLocale:
+    risultato: EnumerazioneLocale = {}
+    for ramo in rami:
+        for k, (conteggio, per_cella) in ramo.items():
+            if k in risultato:
+                totale, somme = risultato[k]
+                risultato[k] = (totale + conteggio, tuple(a + b for a, b in zip(somme, per_cella)))
+            else:
+                risultato[k] = (conteggio, per_cella)
+    return risultato
+
+
+def _convoluzione(a: List[int], b: List[int]) -> List[int]:
+    risultato: List[int] = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                risultato[i + j] += x * y
+    return risultato
+
+
+def _comb(n: int, k: int) -> int:
+    return comb(n, k) if 0 <= k <= n else 0
+
+
+class MotoreProbabilita:
+    """
+    Calcolo esatto delle probabilità con un pool di processi (creato al primo uso e
+    tenuto aperto fino a chiudi) e una cache LRU delle enumerazioni per firma.
+    Con processi = 1 tutto viene calcolato nel processo corrente.
+    """
+
+    def __init__(self, processi: Optional[int] = None, soglia_parallela: int = 12,
+                 soglia_rami: int = 28, max_componenti: int = 4096) -> None:
+        self.processi: int = processi or os.cpu_count() or 1
+        # Componenti con meno caselle si enumerano qui: inviarle costerebbe di più
+        self.soglia_parallela: int = soglia_parallela
+        # Componenti con almeno tante caselle si dividono in rami tra i processi
+        self.soglia_rami: int = soglia_rami
+        self.max_componenti: int = max_componenti
+        self.componenti_enumerate: int = 0
+        self.componenti_dalla_cache: int = 0
+        self._cache: 'OrderedDict[Firma, EnumerazioneLocale]' = OrderedDict()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _avvia_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.processi)
+        return self._pool
+
+    def chiudi(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> 'MotoreProbabilita':
+        return self
+
+    def __exit__(self, *eccezione: object) -> None:
+        self.chiudi()
+
+    def calcola(self, tabellone: Tabellone, n_mine: Optional[int] = None) -> Soluzione:
+        """
+        Probabilità esatte per lo stato visibile del tabellone. ValueError se nessuna
+        disposizione di n_mine mine (predefinito: quelle del tabellone) è compatibile.
+        """
+        t = tabellone
+        n_mine = len(t.mine) if n_mine is None else n_mine
+        vincoli: List[Vincolo] = []
+        for idx in t.scoperte:
+            v: Optional[Vincolo] = vincolo(t, idx)
+            if v is not None:
+                vincoli.append(v)
+        sicure, mine, residui = propaga(vincoli, rigoroso=True)
+        firme: List[Tuple[Firma, List[int]]] = [firma(c) for c in componenti(residui)]
+        enumerazioni: Dict[Firma, EnumerazioneLocale] = self._enumera_tutte(
+            [f for f, _ in firme])
+
+        frontiera: int = sum(len(celle) for _, celle in firme)
+        coperte: int = t.righe * t.colonne - len(t.scoperte) - len(t.segnate)
+        interne: int = coperte - len(sicure) - len(mine) - frontiera
+        rimaste: int = n_mine - len(t.segnate) - len(mine)
+
+        # distribuzioni[j][k]: configurazioni della componente j con k mine
+        distribuzioni: List[List[int]] = []
+        for f, _ in firme:
+            enumerazione = enumerazioni[f]
+            distribuzione: List[int] = [0] * (1 + max(enumerazione, default=0))
+            for k, (conteggio, _) in enumerazione.items():
+                distribuzione[k] = conteggio
+            distribuzioni.append(distribuzione)
+        # Convoluzioni di tutte le componenti prima di j e da j in poi
+        prima: List[List[int]] = [[1]]
+        for distribuzione in distribuzioni:
+            prima.append(_convoluzione(prima[-1], distribuzione))
+        dopo: List[List[int]] = [[1]]
+        for distribuzione in reversed(distribuzioni):
+            dopo.append(_convoluzione(distribuzione, dopo[-1]))
+        dopo.reverse()
+
+        tutte: List[int] = prima[-1]
+        totale: int = sum(n * _comb(interne, rimaste - s) for s, n in enumerate(tutte))
+        if totale == 0:
+            raise ValueError("Nessuna disposizione delle mine è compatibile con il tabellone.")
+
+        probabilita: Dict[int, float] = {}
+        for j, (f, celle) in enumerate(firme):
+            altre: List[int] = _convoluzione(prima[j], dopo[j + 1])
+            minate: List[int] = [0] * len(celle)
+            for k, (_, per_cella) in enumerazioni[f].items():
+                peso: int = sum(n * _comb(interne, rimaste - k - s) for s, n in enumerate(altre))
+                if peso:
+                    for i, n in enumerate(per_cella):
+                        minate[i] += n * peso
+            for idx, n in zip(celle, minate):
+                if n == 0:
+                    sicure.add(idx)
+                elif n == totale:
+                    mine.add(idx)
+                else:
+                    probabilita[idx] = n / totale
+        interne_minate: int = sum(n * _comb(interne - 1, rimaste - s - 1)
+                                  for s, n in enumerate(tutte))
+        probabilita_interna: float = interne_minate / totale if interne > 0 else 0.0
+        return Soluzione(sicure, mine, probabilita, probabilita_interna)
+
+    def _enumera_tutte(self, firme: Sequence[Firma]) -> Dict[Firma, EnumerazioneLocale]:
+        risultato: Dict[Firma, EnumerazioneLocale] = {}
+        mancanti: List[Firma] = []
+        for f in firme:
+            if f in risultato:
+                continue
+            enumerazione: Optional[EnumerazioneLocale] = self._cache.get(f)
+            if enumerazione is None:
+                if f not in mancanti:
+                    mancanti.append(f)
+                continue
+            self._cache.move_to_end(f)
+            self.componenti_dalla_cache += 1
+            risultato[f] = enumerazione
+
+        compiti: Dict[Firma, List['Future[EnumerazioneLocale]']] = {}
+        for f in mancanti:
+            n_celle: int = 1 + max(max(c) for c, _ in f)
+            if self.processi == 1 or n_celle < self.soglia_parallela:
+                continue
+            pool: ProcessPoolExecutor = self._avvia_pool()
+            compiti[f] = [pool.submit(enumera_firma, f, fissate) for fissate in self._rami(f)]
+        # Le componenti piccole si enumerano mentre i processi lavorano su quelle grandi
+        for f in mancanti:
+            if f not in compiti:
+                risultato[f] = enumera_firma(f)
+        for f, futuri in compiti.items():
+            risultato[f] = _unisci([futuro.result() for futuro in futuri])
+
+        for f in mancanti:
+            self.componenti_enumerate += 1
+            self._cache[f] = risultato[f]
+            if len(self._cache) > self.max_componenti:
+                self._cache.popitem(last=False)
+        return risultato
+
+    def _rami(self, vincoli: Firma) -> List[Tuple[Tuple[int, int], ...]]:
+        """Assegnazioni delle caselle più vincolate, una per ramo (una sola, vuota, se piccola)."""
+        n_celle: int = 1 + max(max(c) for c, _ in vincoli)
+        if n_celle < self.soglia_rami:
+            return [()]
+        # Circa quattro rami per processo, per bilanciare rami di dimensioni diverse
+        profondita: int = min((4 * self.processi - 1).bit_length(), n_celle)
+        grado: List[int] = [0] * n_celle
+        for celle, _ in vincoli:
+            for i in celle:
+                grado[i] += 1
+        scelte: List[int] = sorted(range(n_celle), key=lambda i: (-grado[i], i))[:profondita]
+        return [tuple(zip(scelte, valori)) for valori in product((0, 1), repeat=profondita)]
+
+
+def calcola(tabellone: Tabellone, n_mine: Optional[int] = None) -> Soluzione:
+    """Probabilità esatte nel processo corrente, senza cache condivisa tra chiamate."""
+    return MotoreProbabilita(processi=1).calcola(tabellone, n_mine)
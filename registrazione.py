@@ -0,0 +1,266 @@
+"""
+Formato binario compatto per registrare partite e rigiocarle.
+
+Un archivio è una sequenza di partite, ognuna composta da:
+
+- intestazione (struct _INTESTAZIONE, little-endian): "CMR1", larghezza, altezza,
+  n_mine, tipo di disposizione, seme, numero di mosse (_APERTA finché la partita non
+  viene chiusa);
+- se il tipo è _TIPO_BITMAP, la mappa delle mine (un bit per casella);
+- le mosse, un record _MOSSA (riga, colonna, azione) da 9 byte ciascuna. Un blocco di
+  Partita.applica_mosse è un record (n, 0, _AZIONE_BLOCCO) seguito dalle sue n mosse.
+
+Con un seme intero la disposizione non viene salvata: stesso seme e stesse mosse
+ricostruiscono la stessa partita (vedi Partita). Lo ScrittoreRegistrazioni segue una
+partita durante il gioco e scrive ogni mossa appena fatta; il LettoreRegistrazioni usa
+mmap, quindi scorre archivi con milioni di partite leggendo solo le intestazioni e
+salta direttamente alla mossa N di una partita.
+
+Se lo scrittore non viene chiuso (es. il processo termina) l'ultima partita resta
+_APERTA: il lettore conta le sue mosse dalla dimensione del file e ignora un record o
+un'intestazione troncati, e il prossimo ScrittoreRegistrazioni sullo stesso archivio
+completa l'intestazione e tronca i byte incompleti prima di aggiungere partite.
+"""
+from typing import Any, BinaryIO, Iterator, List, Optional
+import mmap
+import os
+import struct
+
+from campo_minato import (Partita, Mossa, AZIONE_SCOPRI, AZIONE_SEGNA, AZIONE_INDIETRO,
+                          AZIONE_AVANTI, AZIONE_SCOPRI_VICINI)
+
+_MAGIA: bytes = b"CMR1"
+_INTESTAZIONE = struct.Struct("<4sIIIB3xQQ")
+_MOSSA = struct.Struct("<IIB")
+# Posizione del numero di mosse nell'intestazione, aggiornato alla chiusura
+_OFFSET_N_MOSSE: int = _INTESTAZIONE.size - 8
+# Numero di mosse di una partita non ancora chiusa: le mosse arrivano fino alla fine del file
+_APERTA: int = (1 << 64) - 1
+
+_TIPO_NESSUNA: int = 0  # le mine non sono mai state piazzate (nessuna casella scoperta)
+_TIPO_SEME: int = 1
+_TIPO_BITMAP: int = 2
+
+_AZIONE_BLOCCO: int = 255  # intestazione di un blocco di mosse (vedi Partita.applica_mosse)
+
+
+def _codifica_mine(mine: Iterator[int], celle: int) -> bytes:
+    bitmap = bytearray((celle + 7) // 8)
+    for idx in mine:
+        bitmap[idx >> 3] |= 1 << (idx & 7)
+    return bytes(bitmap)
+
+
+def _decodifica_mine(bitmap: bytes) -> List[int]:
+    mine: List[int] = []
+    for i, byte in enumerate(bitmap):
+        while byte:
+            basso: int = byte & -byte
+            mine.append(i * 8 + basso.bit_length() - 1)
+            byte ^= basso
+    return mine
+
+
+class ScrittoreRegistrazioni:
+    """
+    Aggiunge partite in coda a un archivio. Con segui(partita) ogni mossa della partita
+    viene scritta appena eseguita; un reset della partita chiude la registrazione
+    corrente e ne apre una nuova.
+    """
+
+    def __init__(self, percorso: str) -> None:
+        esiste: bool = os.path.exists(percorso)
+        fine: int = 0
+        aperta: Optional[Registrazione] = None
+        if esiste:
+            with LettoreRegistrazioni(percorso) as lettore:
+                for registrazione in lettore:
+                    fine = registrazione.fine
+                    aperta = registrazione if registrazione.aperta else None
+        self._file: BinaryIO = open(percorso, "r+b" if esiste else "w+b")
+        # Completa l'ultima partita di uno scrittore non chiuso e scarta i byte troncati
+        if aperta is not None:
+            self._file.seek(aperta.inizio + _OFFSET_N_MOSSE)
+            self._file.write(struct.pack("<Q", aperta.n_mosse))
+        self._file.truncate(fine)
+        self._file.seek(fine)
+        self._partita: Optional[Partita] = None
+        self._inizio: int = -1  # posizione dell'intestazione, -1 se non ancora scritta
+        self._n_mosse: int = 0
+        self._in_attesa: List[Mossa] = []  # mosse fatte prima di conoscere le mine
+        self._usa_seme: bool = False
+
+    def segui(self, partita: Partita) -> None:
+        self._termina()
+        self._partita = partita
+        # Il seme basta solo se le mine non sono ancora state piazzate e sta in 64 bit
+        self._usa_seme = (partita.seme is not None and 0 <= partita.seme < 1 << 64
+                          and not partita.tabellone.mine_piazzate)
+        partita.aggiungi_osservatore(self._evento)
+        self._prova_intestazione()
+
+    def _evento(self, evento: str, dati: Any) -> None:
+        if evento == "reset":
+            partita = self._partita
+            assert partita is not None
+            self.segui(partita)
+        elif evento == "mossa":
+            self._in_attesa.append(dati)
+            self._prova_intestazione()
+        elif evento == "mosse":
+            self._in_attesa.append(Mossa(len(dati), 0, _AZIONE_BLOCCO))
+            self._in_attesa.extend(dati)
+            self._prova_intestazione()
+
+    def _prova_intestazione(self) -> None:
+        partita = self._partita
+        assert partita is not None
+        if self._inizio < 0:
+            if self._usa_seme:
+                self._scrivi_intestazione(_TIPO_SEME, partita.seme or 0)
+            elif partita.tabellone.mine_piazzate:
+                self._scrivi_intestazione(_TIPO_BITMAP, 0)
+            else:
+                return
+        for mossa in self._in_attesa:
+            self._file.write(_MOSSA.pack(*mossa))
+        self._n_mosse += len(self._in_attesa)
+        self._in_attesa = []
+
+    def _scrivi_intestazione(self, tipo: int, seme: int) -> None:
+        partita = self._partita
+        assert partita is not None
+        self._inizio = self._file.tell()
+        self._file.write(_INTESTAZIONE.pack(_MAGIA, partita.larghezza, partita.altezza,
+                                            partita.n_mine, tipo, seme, _APERTA))
+        if tipo == _TIPO_BITMAP:
+            self._file.write(_codifica_mine(iter(partita.tabellone.mine),
+                                            partita.larghezza * partita.altezza))
+
+    def _termina(self) -> None:
+        """Completa la partita in corso: intestazione, mosse in attesa e numero di mosse."""
+        if self._partita is None:
+            return
+        self._partita.rimuovi_osservatore(self._evento)
+        if self._inizio < 0:
+            self._scrivi_intestazione(_TIPO_NESSUNA, 0)
+            self._prova_intestazione()
+        fine: int = self._file.tell()
+        self._file.seek(self._inizio + _OFFSET_N_MOSSE)
+        self._file.write(struct.pack("<Q", self._n_mosse))
+        self._file.seek(fine)
+        self._partita = None
+        self._inizio = -1
+        self._n_mosse = 0
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def chiudi(self) -> None:
+        self._termina()
+        self._file.close()
+
+    def __enter__(self) -> 'ScrittoreRegistrazioni':
+        return self
+
+    def __exit__(self, *eccezione: object) -> None:
+        self.chiudi()
+
+
+class Registrazione:
+    """Una partita dell'archivio: legge dalla mappa in memoria solo ciò che serve."""
+
+    def __init__(self, dati: mmap.mmap, inizio: int) -> None:
+        (magia, self.larghezza, self.altezza, self.n_mine, self._tipo, seme,
+         self.n_mosse) = _INTESTAZIONE.unpack_from(dati, inizio)
+        if magia != _MAGIA:
+            raise ValueError(f"Registrazione non valida alla posizione {inizio}.")
+        self.inizio: int = inizio
+        self.seme: Optional[int] = seme if self._tipo == _TIPO_SEME else None
+        self._dati: mmap.mmap = dati
+        self._bitmap: int = inizio + _INTESTAZIONE.size
+        dimensione_bitmap: int = ((self.larghezza * self.altezza + 7) // 8
+                                  if self._tipo == _TIPO_BITMAP else 0)
+        self._mosse: int = self._bitmap + dimensione_bitmap
+        # Partita di uno scrittore non chiuso: valgono i record completi fino alla fine del file
+        self.aperta: bool = self.n_mosse == _APERTA
+        if self.aperta:
+            self.n_mosse = max(0, len(dati) - self._mosse) // _MOSSA.size
+        self.fine: int = self._mosse + self.n_mosse * _MOSSA.size
+
+    def mine(self) -> Optional[List[int]]:
+        """Indici delle mine se salvati nella registrazione, altrimenti None."""
+        if self._tipo != _TIPO_BITMAP:
+            return None
+        return _decodifica_mine(self._dati[self._bitmap:self._mosse])
+
+    def mossa(self, n: int) -> Mossa:
+        if not 0 <= n < self.n_mosse:
+            raise IndexError("mossa fuori intervallo")
+        return Mossa(*_MOSSA.unpack_from(self._dati, self._mosse + n * _MOSSA.size))
+
+    def mosse(self) -> Iterator[Mossa]:
+        for valori in _MOSSA.iter_unpack(self._dati[self._mosse:self.fine]):
+            yield Mossa(*valori)
+
+    def partita(self, n: Optional[int] = None, compatto: bool = False) -> Partita:
+        """
+        Ricostruisce la partita dopo i primi n record di mossa (tutti se n è None). Un
+        blocco troncato da n viene rigiocato con le sole mosse incluse.
+        """
+        n = self.n_mosse if n is None else n
+        partita = Partita(self.larghezza, self.altezza, self.n_mine, compatto=compatto,
+                          seme=self.seme, disposizione=self.mine())
+        i: int = 0
+        while i < n:
+            riga, colonna, azione = self.mossa(i)
+            i += 1
+            if azione == _AZIONE_BLOCCO:
+                fine: int = min(i + riga, n)
+                partita.applica_mosse([self.mossa(j) for j in range(i, fine)])
+                i = fine
+            elif azione == AZIONE_SCOPRI_VICINI:
+                partita.scopri_vicini(riga, colonna)
+            elif azione == AZIONE_SCOPRI:
+                partita.scopriCasella(riga, colonna)
+            elif azione == AZIONE_SEGNA:
+                partita.segna_casella(riga, colonna)
+            elif azione == AZIONE_INDIETRO:
+                partita.muovi_mossa("indietro")
+            elif azione == AZIONE_AVANTI:
+                partita.muovi_mossa("avanti")
+        return partita
+
+
+class LettoreRegistrazioni:
+    """Archivio di registrazioni mappato in memoria, iterabile partita per partita."""
+
+    def __init__(self, percorso: str) -> None:
+        self._file: BinaryIO = open(percorso, "rb")
+        dimensione: int = os.fstat(self._file.fileno()).st_size
+        self._dati: Optional[mmap.mmap] = (mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                                           if dimensione else None)
+
+    def __iter__(self) -> Iterator[Registrazione]:
+        if self._dati is None:
+            return
+        posizione: int = 0
+        while posizione < len(self._dati):
+            if len(self._dati) - posizione < _INTESTAZIONE.size:
+                return  # intestazione troncata da uno scrittore non chiuso
+            registrazione = Registrazione(self._dati, posizione)
+            if registrazione.fine > len(self._dati):
+                return  # mappa delle mine troncata
+            yield registrazione
+            posizione = registrazione.fine
+
+    def chiudi(self) -> None:
+        if self._dati is not None:
+            self._dati.close()
+        self._file.close()
+
+    def __enter__(self) -> 'LettoreRegistrazioni':
+        return self
+
+    def __exit__(self, *eccezione: object) -> None:
+        self.chiudi()
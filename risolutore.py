@@ -0,0 +1,297 @@
+"""
+Risolutore a propagazione di vincoli per il campo minato.
+
+Legge solo lo stato visibile di un Tabellone: i numeri delle caselle scoperte
+(mine_adiacenti_cache) e i contrassegni del giocatore (segnate, considerati mine).
+Ogni casella scoperta con vicini coperti dà un vincolo "tra queste caselle ci sono n mine".
+La risoluzione procede in tre passi:
+
+1. regole banali (n = 0: tutte sicure; n = numero di caselle: tutte mine) e regola
+   dei sottoinsiemi (se A ⊂ B, in B - A ci sono n(B) - n(A) mine), fino a punto fisso;
+2. divisione della frontiera rimasta in componenti indipendenti (vincoli che non
+   condividono caselle);
+3. enumerazione delle configurazioni di ogni componente, da cui le probabilità.
+
+Le enumerazioni sono memorizzate per insieme di vincoli, quindi dopo una mossa
+(aggiorna) si ricalcolano solo i vincoli vicini alle caselle cambiate e si rienumerano
+solo le componenti che sono effettivamente cambiate.
+"""
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from campo_minato import Tabellone
+
+# Un vincolo: (caselle coperte, numero di mine tra esse)
+Vincolo = Tuple[FrozenSet[int], int]
+# Esito dell'enumerazione di una componente: numero di mine k ->
+# (configurazioni con k mine, per casella: configurazioni con k mine in cui è minata)
+Enumerazione = Dict[int, Tuple[int, Dict[int, int]]]
+
+
+class Soluzione:
+    """Esito di Risolutore.risolvi."""
+
+    def __init__(self, sicure: Set[int], mine: Set[int], probabilita: Dict[int, float],
+                 probabilita_interna: float) -> None:
+        self.sicure: Set[int] = sicure  # caselle coperte sicuramente prive di mine
+        self.mine: Set[int] = mine  # caselle coperte sicuramente minate (non segnate)
+        self.probabilita: Dict[int, float] = probabilita  # caselle della frontiera
+        # probabilità per ogni casella coperta che non confina con caselle scoperte
+        self.probabilita_interna: float = probabilita_interna
+
+    def probabilita_di(self, idx: int) -> float:
+        if idx in self.sicure:
+            return 0.0
+        if idx in self.mine:
+            return 1.0
+        return self.probabilita.get(idx, self.probabilita_interna)
+
+
+class Risolutore:
+    """
+    Risolutore incrementale legato a un tabellone: dopo ogni modifica va chiamato
+    aggiorna con le caselle cambiate (per esempio Partita.preleva_celle_modificate()).
+    """
+
+    def __init__(self, tabellone: Tabellone, n_mine: Optional[int] = None,
+                 limite_enumerazione: int = 40) -> None:
+        self.tabellone: Tabellone = tabellone
+        self.n_mine: int = len(tabellone.mine) if n_mine is None else n_mine
+        # Componenti più grandi di così vengono stimate invece che enumerate
+        self.limite_enumerazione: int = limite_enumerazione
+        self._vincoli: Dict[int, Vincolo] = {}  # casella scoperta -> suo vincolo
+        self._enumerazioni: Dict[FrozenSet[Vincolo], Optional[Enumerazione]] = {}
+        self.aggiorna()
+
+    def aggiorna(self, celle: Optional[Iterable[int]] = None) -> None:
+        """Ricalcola i vincoli toccati dalle caselle cambiate (tutti se celle è None)."""
+        t = self.tabellone
+        if celle is None:
+            self._vincoli = {}
+            da_ricalcolare: Set[int] = set(t.scoperte)
+        else:
+            da_ricalcolare = set()
+            for idx in celle:
+                da_ricalcolare.add(idx)
+                da_ricalcolare.update(t.vicini(idx))
+        for idx in da_ricalcolare:
+            vincolo: Optional[Vincolo] = self._vincolo(idx)
+            if vincolo is None:
+                self._vincoli.pop(idx, None)
+            else:
+                self._vincoli[idx] = vincolo
+
+    def _vincolo(self, idx: int) -> Optional[Vincolo]:
+        return vincolo(self.tabellone, idx)
+
+    def risolvi(self) -> Soluzione:
+        sicure, mine, vincoli = propaga(self._vincoli.values())
+        probabilita: Dict[int, float] = {}
+        # Le mine dedotte dalla propagazione non sono tra le interne
+        mine_attese: float = len(mine)
+        enumerazioni_usate: Dict[FrozenSet[Vincolo], Optional[Enumerazione]] = {}
+        for componente in componenti(vincoli):
+            chiave: FrozenSet[Vincolo] = frozenset(componente)
+            if chiave not in self._enumerazioni:
+                celle: Set[int] = set().union(*(c for c, _ in componente))
+                self._enumerazioni[chiave] = (enumera(componente)
+                                              if len(celle) <= self.limite_enumerazione
+                                              else None)
+            enumerazione = enumerazioni_usate[chiave] = self._enumerazioni[chiave]
+            parziali: Dict[int, float] = (probabilita_uniformi(enumerazione)
+                                          if enumerazione is not None
+                                          else stima_densita(componente))
+            for idx, p in parziali.items():
+                if p == 0.0:
+                    sicure.add(idx)
+                elif p == 1.0:
+                    mine.add(idx)
+                else:
+                    probabilita[idx] = p
+            mine_attese += sum(parziali.values())
+        # Le componenti sparite dalla frontiera non servono più
+        self._enumerazioni = enumerazioni_usate
+
+        t = self.tabellone
+        coperte: int = t.righe * t.colonne - len(t.scoperte) - len(t.segnate)
+        interne: int = coperte - len(sicure) - len(mine) - len(probabilita)
+        mine_interne: float = self.n_mine - len(t.segnate) - mine_attese
+        probabilita_interna: float = (min(max(mine_interne / interne, 0.0), 1.0)
+                                      if interne > 0 else 0.0)
+        return Soluzione(sicure, mine, probabilita, probabilita_interna)
+
+
+def vincolo(t: Tabellone, idx: int) -> Optional[Vincolo]:
+    """Vincolo dato dalla casella idx, None se non è scoperta o non ha vicini coperti."""
+    if idx not in t.scoperte or idx in t.mine:
+        return None
+    coperte: List[int] = []
+    segnate: int = 0
+    for j in t.vicini(idx):
+        if j in t.segnate:
+            segnate += 1
+        elif j not in t.scoperte:
+            coperte.append(j)
+    if not coperte:
+        return None
+    return frozenset(coperte), t.mine_adiacenti_cache[idx] - segnate
+
+
+def propaga(vincoli: Iterable[Vincolo],
+            rigoroso: bool = False) -> Tuple[Set[int], Set[int], Set[Vincolo]]:
+    """
+    Applica regole banali e dei sottoinsiemi fino a punto fisso. Restituisce le caselle
+    sicure, quelle minate e i vincoli residui (ridotti alle caselle ancora incerte).
+    I vincoli incoerenti (per esempio per un contrassegno sbagliato) vengono ignorati,
+    oppure con rigoroso=True sollevano ValueError.
+    """
+    sicure: Set[int] = set()
+    mine: Set[int] = set()
+    correnti: Set[Vincolo] = set(vincoli)
+    # Vincoli già considerati: la regola dei sottoinsiemi non li riaggiunge, così
+    # anche con vincoli incoerenti il ciclo termina
+    visti: Set[Vincolo] = set(correnti)
+    cambiato: bool = True
+    while cambiato:
+        cambiato = False
+        ridotti: Set[Vincolo] = set()
+        for celle, n in correnti:
+            incerte: FrozenSet[int] = celle - sicure - mine
+            n -= len(celle & mine)
+            if not 0 <= n <= len(incerte):
+                if rigoroso:
+                    raise ValueError("Vincoli incoerenti: nessuna disposizione delle mine "
+                                     "è compatibile con il tabellone.")
+                continue  # incoerente con i contrassegni
+            if not incerte:
+                continue  # vincolo esaurito
+            if n == 0:
+                sicure |= incerte
+                cambiato = True
+            elif n == len(incerte):
+                mine |= incerte
+                cambiato = True
+            else:
+                ridotti.add((incerte, n))
+        correnti = ridotti
+        visti |= ridotti
+        if cambiato:
+            continue
+        # Regola dei sottoinsiemi, confrontando solo vincoli che condividono caselle
+        per_cella: Dict[int, List[Vincolo]] = {}
+        for vincolo in correnti:
+            for idx in vincolo[0]:
+                per_cella.setdefault(idx, []).append(vincolo)
+        nuovi: Set[Vincolo] = set()
+        for piccolo in correnti:
+            celle_p, n_p = piccolo
+            for grande in per_cella[next(iter(celle_p))]:
+                celle_g, n_g = grande
+                if len(celle_g) > len(celle_p) and celle_p < celle_g:
+                    differenza: Vincolo = (celle_g - celle_p, n_g - n_p)
+                    if differenza not in visti:
+                        nuovi.add(differenza)
+        if nuovi:
+            visti |= nuovi
+            correnti |= nuovi
+            cambiato = True
+    return sicure, mine, correnti
+
+
+def componenti(vincoli: Iterable[Vincolo]) -> List[List[Vincolo]]:
+    """Divide i vincoli in gruppi che non condividono caselle."""
+    per_cella: Dict[int, List[Vincolo]] = {}
+    for vincolo in vincoli:
+        for idx in vincolo[0]:
+            per_cella.setdefault(idx, []).append(vincolo)
+    visitati: Set[Vincolo] = set()
+    risultato: List[List[Vincolo]] = []
+    for iniziale in {v for gruppo in per_cella.values() for v in gruppo}:
+        if iniziale in visitati:
+            continue
+        visitati.add(iniziale)
+        componente: List[Vincolo] = []
+        da_visitare: List[Vincolo] = [iniziale]
+        while da_visitare:
+            vincolo = da_visitare.pop()
+            componente.append(vincolo)
+            for idx in vincolo[0]:
+                for vicino in per_cella[idx]:
+                    if vicino not in visitati:
+                        visitati.add(vicino)
+                        da_visitare.append(vicino)
+        risultato.append(componente)
+    return risultato
+
+
+def enumera(componente: List[Vincolo]) -> Enumerazione:
+    """Enumera con backtracking tutte le configurazioni di mine che rispettano i vincoli."""
+    # Ordine di visita che segue i vincoli, così le potature scattano presto
+    ordine: List[int] = []
+    viste: Set[int] = set()
+    for celle, _ in sorted(componente, key=lambda v: len(v[0])):
+        for idx in sorted(celle):
+            if idx not in viste:
+                viste.add(idx)
+                ordine.append(idx)
+    vincoli_di: Dict[int, List[int]] = {idx: [] for idx in ordine}
+    mancanti: List[int] = []  # mine ancora da piazzare per vincolo
+    libere: List[int] = []  # caselle non ancora assegnate per vincolo
+    for i, (celle, n) in enumerate(componente):
+        mancanti.append(n)
+        libere.append(len(celle))
+        for idx in celle:
+            vincoli_di[idx].append(i)
+
+    risultato: Enumerazione = {}
+    assegnate: List[int] = []
+
+    def passo(pos: int) -> None:
+        if pos == len(ordine):
+            k: int = len(assegnate)
+            conteggio, per_cella = risultato.get(k, (0, {}))
+            for idx in assegnate:
+                per_cella[idx] = per_cella.get(idx, 0) + 1
+            risultato[k] = (conteggio + 1, per_cella)
+            return
+        idx = ordine[pos]
+        for mina in (0, 1):
+            valida: bool = True
+            for i in vincoli_di[idx]:
+                libere[i] -= 1
+                mancanti[i] -= mina
+                if mancanti[i] < 0 or mancanti[i] > libere[i]:
+                    valida = False
+            if valida:
+                if mina:
+                    assegnate.append(idx)
+                passo(pos + 1)
+                if mina:
+                    assegnate.pop()
+            for i in vincoli_di[idx]:
+                libere[i] += 1
+                mancanti[i] += mina
+
+    passo(0)
+    for k, (conteggio, per_cella) in risultato.items():
+        for idx in ordine:
+            per_cella.setdefault(idx, 0)
+    return risultato
+
+
+def probabilita_uniformi(enumerazione: Enumerazione) -> Dict[int, float]:
+    """Probabilità di mina per casella, pesando allo stesso modo ogni configurazione."""
+    totale: int = sum(conteggio for conteggio, _ in enumerazione.values())
+    minate: Dict[int, int] = {}
+    for _, per_cella in enumerazione.values():
+        for idx, n in per_cella.items():
+            minate[idx] = minate.get(idx, 0) + n
+    return {idx: n / totale for idx, n in minate.items()} if totale else {}
+
+
+def stima_densita(componente: List[Vincolo]) -> Dict[int, float]:
+    """Stima per componenti troppo grandi: media delle densità dei vincoli della casella."""
+    densita: Dict[int, List[float]] = {}
+    for celle, n in componente:
+        for idx in celle:
+            densita.setdefault(idx, []).append(n / len(celle))
+    return {idx: sum(valori) / len(valori) for idx, valori in densita.items()}
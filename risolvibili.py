@@ -0,0 +1,233 @@
+"""
+Scorta di tabelloni risolvibili senza tentativi ("no-guess"), preparati in background.
+
+Un tabellone è risolvibile se, partendo dalla casella iniziale, il Risolutore riesce a
+scoprire tutte le caselle sicure usando solo deduzioni certe. Verificarlo richiede una
+partita intera giocata dal risolutore, troppo lenta da fare al click su "New": i processi
+della ScortaTabelloni generano e verificano disposizioni per i formati configurati
+(larghezza, altezza, mine) e le tengono pronte in code limitate. Con una cartella di cache
+le disposizioni non usate vengono salvate alla chiusura (nel formato di registrazione.py,
+una partita con la sola mossa iniziale) e riprese all'avvio successivo.
+
+Esempio:
+    with ScortaTabelloni([(30, 16, 99)], cartella_cache="cache") as scorta:
+        partita = Partita(30, 16, 99)
+        scorta.applica(partita, attesa=5.0)  # partita già avviata dalla casella iniziale
+"""
+from collections import deque
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import multiprocessing
+import os
+import queue
+import random
+
+from campo_minato import Partita, Mossa, AZIONE_SCOPRI, AZIONE_SEGNA
+from registrazione import LettoreRegistrazioni, ScrittoreRegistrazioni
+from probabilita import calcola as calcola_probabilita
+from risolutore import Risolutore
+
+# (larghezza, altezza, mine)
+Formato = Tuple[int, int, int]
+
+
+class Disposizione(NamedTuple):
+    larghezza: int
+    altezza: int
+    n_mine: int
+    inizio: Tuple[int, int]  # (riga, colonna) da cui la partita si risolve senza tentativi
+    mine: Tuple[int, ...]
+
+
+def risolvibile(partita: Partita) -> bool:
+    """
+    Gioca la partita (con le mine già piazzate e almeno una casella scoperta) usando solo
+    deduzioni certe (Risolutore e, quando non basta, probabilità esatte a 0 o 1); True se si
+    arriva alla vittoria.
+    """
+    risolutore = Risolutore(partita.tabellone, partita.n_mine)
+    partita.preleva_celle_modificate()
+    colonne: int = partita.larghezza
+    t = partita.tabellone
+    while partita.stato_corrente == 0:
+        soluzione = risolutore.risolvi()
+        mosse: List[Mossa] = ([Mossa(*divmod(idx, colonne), AZIONE_SEGNA) for idx in soluzione.mine] +
+                              [Mossa(*divmod(idx, colonne), AZIONE_SCOPRI) for idx in soluzione.sicure])
+        if not mosse:
+            # Deduzioni locali esaurite: il conteggio esatto, che tiene conto del numero
+            # totale di mine, può dare altre caselle certe (per esempio tutte le interne)
+            esatta = calcola_probabilita(t, partita.n_mine)
+            mosse = ([Mossa(*divmod(idx, colonne), AZIONE_SEGNA) for idx in esatta.mine] +
+                     [Mossa(*divmod(idx, colonne), AZIONE_SCOPRI) for idx in esatta.sicure])
+            if esatta.probabilita_interna == 0.0:
+                frontiera: Set[int] = set(esatta.probabilita) | esatta.sicure | esatta.mine
+                mosse += [Mossa(*divmod(idx, colonne), AZIONE_SCOPRI)
+                          for idx in range(t.righe * colonne)
+                          if idx not in t.scoperte and idx not in t.segnate
+                          and idx not in frontiera]
+        if not mosse:
+            return False
+        partita.applica_mosse(mosse)
+        risolutore.aggiorna(partita.preleva_celle_modificate())
+    return partita.stato_corrente == 1
+
+
+def genera(larghezza: int, altezza: int, n_mine: int, seme: int) -> Optional[Disposizione]:
+    """Un candidato per seme: casella iniziale e mine dal seme, None se serve indovinare."""
+    rng = random.Random(seme)
+    inizio: Tuple[int, int] = (rng.randrange(altezza), rng.randrange(larghezza))
+    partita = Partita(larghezza, altezza, n_mine, seme=rng)
+    partita.scopriCasella(*inizio)
+    mine: Tuple[int, ...] = tuple(sorted(partita.tabellone.mine))
+    if not risolvibile(partita):
+        return None
+    return Disposizione(larghezza, altezza, n_mine, inizio, mine)
+
+
+def _produci(formato: Formato, seme: int, passo: int, coda: 'multiprocessing.Queue[Disposizione]',
+             fermo: 'multiprocessing.synchronize.Event') -> None:
+    # Ogni processo prova i semi seme, seme + passo, ...: processi diversi non si ripetono
+    while not fermo.is_set():
+        disposizione: Optional[Disposizione] = genera(*formato, seme)
+        seme += passo
+        while disposizione is not None and not fermo.is_set():
+            try:
+                coda.put(disposizione, timeout=0.2)
+                break
+            except queue.Full:
+                pass
+
+
+class ScortaTabelloni:
+    """
+    Processi che riempiono una coda limitata di Disposizione risolvibili per ogni formato.
+    Va avviata (avvia o with) e chiusa (chiudi) per salvare la cache.
+    """
+
+    def __init__(self, formati: Iterable[Formato], processi_per_formato: int = 1,
+                 capienza: int = 16, cartella_cache: Optional[str] = None,
+                 seme: Optional[int] = None) -> None:
+        self.formati: List[Formato] = [tuple(f) for f in formati]  # type: ignore[misc]
+        self.processi_per_formato: int = processi_per_formato
+        self.capienza: int = capienza
+        self.cartella_cache: Optional[str] = cartella_cache
+        self._seme: int = random.SystemRandom().randrange(1 << 62) if seme is None else seme
+        self._code: Dict[Formato, 'multiprocessing.Queue[Disposizione]'] = {}
+        # Disposizioni già pronte nel processo corrente (dalla cache), usate per prime
+        self._riserva: Dict[Formato, Deque[Disposizione]] = {f: deque() for f in self.formati}
+        self._processi: List[multiprocessing.Process] = []
+        self._fermo = multiprocessing.Event()
+
+    def avvia(self) -> None:
+        self._carica_cache()
+        passo: int = len(self.formati) * self.processi_per_formato
+        for i, formato in enumerate(self.formati):
+            coda: 'multiprocessing.Queue[Disposizione]' = multiprocessing.Queue(self.capienza)
+            self._code[formato] = coda
+            for k in range(self.processi_per_formato):
+                processo = multiprocessing.Process(
+                    target=_produci, daemon=True,
+                    args=(formato, self._seme + i * self.processi_per_formato + k, passo,
+                          coda, self._fermo))
+                processo.start()
+                self._processi.append(processo)
+
+    def pronte(self, larghezza: int, altezza: int, n_mine: int) -> int:
+        """Numero (approssimato) di disposizioni pronte per il formato."""
+        formato: Formato = (larghezza, altezza, n_mine)
+        coda = self._code.get(formato)
+        return len(self._riserva.get(formato, ())) + (coda.qsize() if coda is not None else 0)
+
+    def preleva(self, larghezza: int, altezza: int, n_mine: int,
+                attesa: Optional[float] = None) -> Disposizione:
+        """
+        Restituisce una disposizione del formato, aspettando al più `attesa` secondi
+        (None: senza limite). TimeoutError se non ce n'è una pronta in tempo.
+        """
+        formato: Formato = (larghezza, altezza, n_mine)
+        if formato not in self._riserva:
+            raise ValueError(f"Formato non previsto dalla scorta: {formato}.")
+        riserva = self._riserva[formato]
+        if riserva:
+            return riserva.popleft()
+        coda = self._code.get(formato)
+        if coda is None:
+            raise TimeoutError("La scorta non è avviata.")
+        try:
+            return coda.get(timeout=attesa) if attesa != 0 else coda.get_nowait()
+        except queue.Empty:
+            raise TimeoutError("Nessun tabellone risolvibile pronto.") from None
+
+    def applica(self, partita: Partita, attesa: Optional[float] = 0.0) -> bool:
+        """
+        Ricomincia la partita su un tabellone risolvibile e scopre la casella iniziale.
+        Se non ce n'è uno pronto entro `attesa` restituisce False e non tocca la partita.
+        """
+        try:
+            disposizione = self.preleva(partita.larghezza, partita.altezza, partita.n_mine, attesa)
+        except TimeoutError:
+            return False
+        partita.reset(disposizione.mine)
+        partita.scopriCasella(*disposizione.inizio)
+        return True
+
+    def chiudi(self) -> None:
+        """Ferma i processi e salva nella cache le disposizioni non usate."""
+        self._fermo.set()
+        for formato, coda in self._code.items():
+            # Le code vanno svuotate prima di join, altrimenti i processi non terminano
+            while True:
+                try:
+                    self._riserva[formato].append(coda.get(timeout=0.1))
+                except queue.Empty:
+                    if not any(p.is_alive() for p in self._processi):
+                        break
+        for processo in self._processi:
+            processo.join()
+        self._processi = []
+        self._code = {}
+        self._salva_cache()
+
+    def __enter__(self) -> 'ScortaTabelloni':
+        self.avvia()
+        return self
+
+    def __exit__(self, *eccezione: object) -> None:
+        self.chiudi()
+
+    # ——— cache su disco ———
+
+    def _percorso_cache(self, formato: Formato) -> str:
+        assert self.cartella_cache is not None
+        return os.path.join(self.cartella_cache, "risolvibili_{}x{}x{}.cmr".format(*formato))
+
+    def _carica_cache(self) -> None:
+        """Sposta in riserva le disposizioni salvate: il file viene consumato."""
+        if self.cartella_cache is None:
+            return
+        for formato in self.formati:
+            percorso: str = self._percorso_cache(formato)
+            if not os.path.exists(percorso):
+                continue
+            with LettoreRegistrazioni(percorso) as lettore:
+                for registrazione in lettore:
+                    mine = registrazione.mine()
+                    if mine is None or registrazione.n_mosse == 0:
+                        continue
+                    riga, colonna, _ = registrazione.mossa(0)
+                    self._riserva[formato].append(
+                        Disposizione(*formato, (riga, colonna), tuple(mine)))
+            os.remove(percorso)
+
+    def _salva_cache(self) -> None:
+        if self.cartella_cache is None:
+            return
+        os.makedirs(self.cartella_cache, exist_ok=True)
+        for formato, riserva in self._riserva.items():
+            if not riserva:
+                continue
+            with ScrittoreRegistrazioni(self._percorso_cache(formato)) as scrittore:
+                while riserva:
+                    disposizione = riserva.popleft()
+                    partita = Partita(*formato, disposizione=disposizione.mine)
+                    scrittore.segui(partita)
+                    partita.scopriCasella(*disposizione.inizio)
@@ -0,0 +1,326 @@
+"""
+Server asyncio che ospita molte partite contemporanee in un solo processo.
+
+Protocollo: una richiesta JSON per riga e una risposta JSON per riga sulla stessa
+connessione (TCP locale o socket Unix). Ogni richiesta ha "cmd" e, tranne "new", la
+"sessione" restituita da "new"; un eventuale "id" viene ripetuto nella risposta.
+
+    {"cmd": "new", "larghezza": 9, "altezza": 9, "mine": 10, "seme": 1, "compatto": false}
+    {"cmd": "reveal", "sessione": "...", "riga": 4, "colonna": 4}
+    {"cmd": "flag", "sessione": "...", "riga": 0, "colonna": 0}
+    {"cmd": "chord", "sessione": "...", "riga": 4, "colonna": 4}
+    {"cmd": "batch", "sessione": "...", "mosse": [[riga, colonna, azione], ...]}
+    {"cmd": "undo", "sessione": "..."}          (e "redo")
+    {"cmd": "state", "sessione": "..."}
+
+Ogni risposta ha "ok" e, se è false, "errore". Le mosse rispondono con lo stato della
+partita (vedi Partita.stato_corrente) e solo le caselle cambiate, come
+[riga, colonna, carattere] con i caratteri di Tabellone.__str__ visti dal giocatore
+(mine coperte nascoste); a partita persa si aggiungono le posizioni delle mine. "state"
+restituisce il tabellone intero, per risincronizzarsi. I messaggi della partita
+(mossa non valida, fine partita) arrivano in "messaggi". "chord" e "batch" usano
+Partita.scopri_vicini e Partita.applica_mosse (azione: 0 scopri, 1 segna, 4 scopri vicini).
+
+Le sessioni inattive da più di `inattivita` secondi vengono chiuse; se la memoria
+(Partita.memoria) di tutte le sessioni supera `memoria_massima` si chiudono quelle usate
+meno di recente. Con `memoria_partita` ogni partita limita da sé la propria storia
+(PoliticaStoria.memoria_massima): le partite lunghe perdono gli annullamenti più vecchi
+invece di far chiudere le altre sessioni.
+
+Esempio:
+    python server.py --porta 8765
+    python server.py --unix /tmp/campo_minato.sock
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import secrets
+import time
+
+from campo_minato import Partita, PoliticaStoria, Tabellone, Mossa
+
+_LIMITE_RIGA: int = 1 << 16  # byte massimi di una richiesta
+
+
+class ErroreRichiesta(ValueError):
+    """Richiesta malformata o non eseguibile: diventa una risposta con ok = false."""
+
+
+def _carattere_visibile(t: Tabellone, idx: int) -> str:
+    if idx in t.scoperte:
+        return t.calcola_cella(idx)
+    return "D" if idx in t.segnate else "C"
+
+
+class Sessione:
+    def __init__(self, id_sessione: str, partita: Partita) -> None:
+        self.id: str = id_sessione
+        self.partita: Partita = partita
+        self.messaggi: List[str] = []
+        self.memoria: int = 0  # ultima misura, già sommata nel totale del server
+        self.ultimo_accesso: float = time.monotonic()
+        partita.aggiungi_osservatore(self._evento)
+
+    def _evento(self, evento: str, dati: Any) -> None:
+        if evento == "messaggio":
+            self.messaggi.append(dati)
+
+
+class ServerPartite:
+    def __init__(self, inattivita: float = 300.0, memoria_massima: int = 512 << 20,
+                 celle_massime: int = 10_000, memoria_partita: Optional[int] = None) -> None:
+        self.inattivita: float = inattivita
+        self.memoria_massima: int = memoria_massima
+        # Byte massimi della storia di ogni partita, None: storia completa
+        self.politica_storia: PoliticaStoria = PoliticaStoria(memoria_massima=memoria_partita)
+        # Tabellone più grande accettato da "new": le mosse girano nel ciclo di eventi, e su
+        # tabelloni enormi una sola mossa bloccherebbe per secondi tutte le altre sessioni
+        self.celle_massime: int = celle_massime
+        # Dalla sessione usata meno di recente alla più recente
+        self._sessioni: 'OrderedDict[str, Sessione]' = OrderedDict()
+        self._memoria: int = 0
+        self._comandi: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+            "new": self._nuova,
+            "reveal": self._scopri,
+            "flag": self._segna,
+            "chord": self._scopri_vicini,
+            "batch": self._blocco,
+            "undo": lambda richiesta: self._muovi(richiesta, "indietro"),
+            "redo": lambda richiesta: self._muovi(richiesta, "avanti"),
+            "state": self._stato,
+        }
+
+    @property
+    def sessioni(self) -> int:
+        return len(self._sessioni)
+
+    @property
+    def memoria(self) -> int:
+        return self._memoria
+
+    def elabora(self, riga: bytes) -> bytes:
+        """Esegue una richiesta (una riga JSON) e restituisce la risposta, senza "\\n"."""
+        richiesta: Dict[str, Any] = {}
+        try:
+            richiesta = json.loads(riga)
+            if not isinstance(richiesta, dict):
+                richiesta = {}
+                raise ErroreRichiesta("La richiesta deve essere un oggetto JSON.")
+            comando = self._comandi.get(_testo(richiesta, "cmd"))
+            if comando is None:
+                raise ErroreRichiesta(f"Comando sconosciuto: {richiesta.get('cmd')!r}.")
+            risposta: Dict[str, Any] = comando(richiesta)
+            risposta["ok"] = True
+        except (ValueError, RuntimeError) as errore:
+            # ValueError comprende ErroreRichiesta, JSON non valido e mosse rifiutate da Partita
+            risposta = {"ok": False, "errore": str(errore)}
+        if "id" in richiesta:
+            risposta["id"] = richiesta["id"]
+        return json.dumps(risposta, separators=(",", ":")).encode()
+
+    # ——— comandi ———
+
+    def _nuova(self, richiesta: Dict[str, Any]) -> Dict[str, Any]:
+        larghezza: int = _intero(richiesta, "larghezza", 9)
+        altezza: int = _intero(richiesta, "altezza", 9)
+        n_mine: int = _intero(richiesta, "mine", 10)
+        seme: Optional[int] = _intero(richiesta, "seme", None)
+        if larghezza < 1 or altezza < 1 or larghezza * altezza > self.celle_massime:
+            raise ErroreRichiesta("Dimensioni del tabellone non valide.")
+        partita = Partita(larghezza, altezza, n_mine, compatto=bool(richiesta.get("compatto")),
+                          seme=seme, politica_storia=self.politica_storia)
+        sessione = Sessione(secrets.token_urlsafe(9), partita)
+        self._sessioni[sessione.id] = sessione
+        self._aggiorna_memoria(sessione)
+        return {"sessione": sessione.id, "larghezza": larghezza, "altezza": altezza,
+                "mine": n_mine}
+
+    def _scopri(self, richiesta: Dict[str, Any]) -> Dict[str, Any]:
+        sessione = self._sessione(richiesta)
+        sessione.partita.scopriCasella(*self._coordinate(richiesta, sessione.partita))
+        return self._modifiche(sessione)
+
+    def _segna(self, richiesta: Dict[str, Any]) -> Dict[str, Any]:
+        sessione = self._sessione(richiesta)
+        sessione.partita.segna_casella(*self._coordinate(richiesta, sessione.partita))
+        return self._modifiche(sessione)
+
+    def _scopri_vicini(self, richiesta: Dict[str, Any]) -> Dict[str, Any]:
+        sessione = self._sessione(richiesta)
+        sessione.partita.scopri_vicini(*self._coordinate(richiesta, sessione.partita))
+        return self._modifiche(sessione)
+
+    def _blocco(self, richiesta: Dict[str, Any]) -> Dict[str, Any]:
+        sessione = self._sessione(richiesta)
+        mosse: Any = richiesta.get("mosse")
+        if (not isinstance(mosse, list) or
+                not all(isinstance(m, list) and len(m) == 3 and
+                        all(isinstance(v, int) and not isinstance(v, bool) for v in m)
+                        for m in mosse)):
+            raise ErroreRichiesta("'mosse' deve essere una lista di [riga, colonna, azione].")
+        sessione.partita.applica_mosse([Mossa(*m) for m in mosse])
+        return self._modifiche(sessione)
+
+    def _muovi(self, richiesta: Dict[str, Any], direzione: str) -> Dict[str, Any]:
+        sessione = self._sessione(richiesta)
+        sessione.partita.muovi_mossa(direzione)
+        return self._modifiche(sessione)
+
+    def _stato(self, richiesta: Dict[str, Any]) -> Dict[str, Any]:
+        sessione = self._sessione(richiesta)
+        partita = sessione.partita
+        # Il client riceve tutto: le modifiche in sospeso non servono più
+        partita.preleva_celle_modificate()
+        return {"stato": partita.stato_corrente,
+                "righe": list(partita.tabellone.righe_testo(nascondi_mine=True))}
+
+    # ——— sessioni ———
+
+    def _sessione(self, richiesta: Dict[str, Any]) -> Sessione:
+        sessione: Optional[Sessione] = self._sessioni.get(_testo(richiesta, "sessione"))
+        if sessione is None:
+            raise ErroreRichiesta("Sessione inesistente o scaduta.")
+        self._sessioni.move_to_end(sessione.id)
+        sessione.ultimo_accesso = time.monotonic()
+        return sessione
+
+    def _coordinate(self, richiesta: Dict[str, Any], partita: Partita) -> Tuple[int, int]:
+        riga: int = _intero(richiesta, "riga", None)
+        colonna: int = _intero(richiesta, "colonna", None)
+        if riga is None or colonna is None:
+            raise ErroreRichiesta("Servono riga e colonna.")
+        if not (0 <= riga < partita.altezza and 0 <= colonna < partita.larghezza):
+            raise ErroreRichiesta("Casella fuori dal tabellone.")
+        return riga, colonna
+
+    def _modifiche(self, sessione: Sessione) -> Dict[str, Any]:
+        partita = sessione.partita
+        t = partita.tabellone
+        colonne: int = partita.larghezza
+        celle: List[List[Any]] = []
+        for idx in partita.preleva_celle_modificate():
+            r, c = divmod(idx, colonne)
+            celle.append([r, c, _carattere_visibile(t, idx)])
+        risposta: Dict[str, Any] = {"stato": partita.stato_corrente, "celle": celle}
+        if partita.stato_corrente == 2:
+            risposta["mine"] = [list(divmod(idx, colonne)) for idx in t.mine]
+        if sessione.messaggi:
+            risposta["messaggi"] = sessione.messaggi
+            sessione.messaggi = []
+        self._aggiorna_memoria(sessione)
+        return risposta
+
+    def _aggiorna_memoria(self, sessione: Sessione) -> None:
+        """Aggiorna la memoria della sessione e chiude le sessioni meno recenti oltre il limite."""
+        memoria: int = sessione.partita.memoria()["totale"]
+        self._memoria += memoria - sessione.memoria
+        sessione.memoria = memoria
+        while self._memoria > self.memoria_massima:
+            # La sessione appena usata è sempre l'ultima: si chiude solo se è rimasta sola
+            meno_recente: Sessione = next(iter(self._sessioni.values()))
+            self._chiudi(meno_recente)
+            if meno_recente is sessione:
+                raise ErroreRichiesta("Memoria del server esaurita: sessione chiusa.")
+
+    def _chiudi(self, sessione: Sessione) -> None:
+        del self._sessioni[sessione.id]
+        self._memoria -= sessione.memoria
+
+    def sfratta_inattive(self) -> int:
+        """Chiude le sessioni inattive da più di `inattivita` secondi e ne restituisce il numero."""
+        limite: float = time.monotonic() - self.inattivita
+        chiuse: int = 0
+        while self._sessioni:
+            meno_recente: Sessione = next(iter(self._sessioni.values()))
+            if meno_recente.ultimo_accesso >= limite:
+                break
+            self._chiudi(meno_recente)
+            chiuse += 1
+        return chiuse
+
+    # ——— rete ———
+
+    async def _gestisci_connessione(self, reader: asyncio.StreamReader,
+                                    writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    riga: bytes = await reader.readline()
+                except ValueError:
+                    # Riga oltre _LIMITE_RIGA: il flusso non è più allineato alle richieste
+                    writer.write(b'{"ok":false,"errore":"Richiesta troppo lunga."}\n')
+                    break
+                if not riga:
+                    break
+                writer.write(self.elabora(riga) + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _pulizia_periodica(self) -> None:
+        while True:
+            await asyncio.sleep(max(self.inattivita / 4, 0.1))
+            self.sfratta_inattive()
+
+    async def servi(self, host: str = "127.0.0.1", porta: int = 8765,
+                    percorso_unix: Optional[str] = None) -> None:
+        """Accetta connessioni finché il task non viene annullato."""
+        if percorso_unix is not None:
+            server = await asyncio.start_unix_server(self._gestisci_connessione, percorso_unix,
+                                                     limit=_LIMITE_RIGA)
+        else:
+            server = await asyncio.start_server(self._gestisci_connessione, host, porta,
+                                                limit=_LIMITE_RIGA)
+        pulizia = asyncio.create_task(self._pulizia_periodica())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            pulizia.cancel()
+
+
+def _testo(richiesta: Dict[str, Any], chiave: str) -> str:
+    valore: Any = richiesta.get(chiave, "")
+    if not isinstance(valore, str):
+        raise ErroreRichiesta(f"'{chiave}' deve essere una stringa.")
+    return valore
+
+
+def _intero(richiesta: Dict[str, Any], chiave: str, predefinito: Any) -> Any:
+    valore: Any = richiesta.get(chiave, predefinito)
+    if valore is not predefinito and (not isinstance(valore, int) or isinstance(valore, bool)):
+        raise ErroreRichiesta(f"'{chiave}' deve essere un intero.")
+    return valore
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Server di partite a campo minato")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--unix", help="percorso di un socket Unix al posto di TCP")
+    parser.add_argument("--inattivita", type=float, default=300.0,
+                        help="secondi dopo cui una sessione inattiva viene chiusa")
+    parser.add_argument("--memoria-mb", type=int, default=512,
+                        help="memoria massima di tutte le sessioni")
+    parser.add_argument("--celle-massime", type=int, default=10_000,
+                        help="caselle massime di un tabellone (una mossa blocca il server)")
+    parser.add_argument("--memoria-partita-kb", type=int,
+                        help="memoria massima della storia di ogni partita (predefinito: nessun limite)")
+    args = parser.parse_args(argv)
+
+    memoria_partita: Optional[int] = (None if args.memoria_partita_kb is None
+                                      else args.memoria_partita_kb << 10)
+    server = ServerPartite(args.inattivita, args.memoria_mb << 20, args.celle_massime,
+                           memoria_partita)
+    try:
+        asyncio.run(server.servi(args.host, args.porta, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
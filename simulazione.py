@@ -0,0 +1,211 @@
+"""
+Simulazione headless di molte partite, distribuite su più processi.
+
+Serve a stimare difficoltà e percentuale di vittorie delle configurazioni del tabellone.
+Ogni partita è identificata dal suo seme, quindi un intervallo di semi produce sempre le
+stesse partite indipendentemente dal numero di processi. Le statistiche vengono
+aggregate blocco per blocco e riportate man mano, senza stampe per singola partita.
+
+Esempio:
+    python simulazione.py --larghezza 30 --altezza 16 --densita 0.2 --semi 0:10000 --processi 8
+"""
+from typing import Callable, Dict, Iterator, List, Optional, Protocol, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import json
+import os
+import random
+import time
+
+from campo_minato import Partita, Mossa, AZIONE_SCOPRI, AZIONE_SEGNA
+from risolutore import Risolutore
+
+
+class Politica(Protocol):
+    def prossime_mosse(self, partita: Partita) -> List[Mossa]: ...
+
+
+class PoliticaCasuale:
+    """Scopre le caselle ancora coperte in un ordine casuale fissato a inizio partita."""
+
+    def __init__(self, partita: Partita, rng: random.Random) -> None:
+        self._ordine: List[int] = list(range(partita.larghezza * partita.altezza))
+        rng.shuffle(self._ordine)
+
+    def prossime_mosse(self, partita: Partita) -> List[Mossa]:
+        while self._ordine:
+            r, c = divmod(self._ordine.pop(), partita.larghezza)
+            if partita.is_coperta(r, c) and not partita.get_casella_segnata(r, c):
+                return [Mossa(r, c, AZIONE_SCOPRI)]
+        return []
+
+
+class PoliticaRisolutore:
+    """
+    Segna tutte le caselle che il risolutore dimostra minate e scopre tutte quelle
+    dimostrate sicure, in un unico blocco di mosse per analisi; solo quando non ce ne
+    sono tira a indovinare la casella meno rischiosa.
+    """
+
+    def __init__(self, partita: Partita, rng: random.Random) -> None:
+        self._rng: random.Random = rng
+        self._risolutore: Risolutore = Risolutore(partita.tabellone, partita.n_mine)
+        partita.preleva_celle_modificate()
+
+    def prossime_mosse(self, partita: Partita) -> List[Mossa]:
+        self._risolutore.aggiorna(partita.preleva_celle_modificate())
+        soluzione = self._risolutore.risolvi()
+        if not soluzione.sicure and not soluzione.mine:
+            tentativo = self._tentativo(partita, soluzione.probabilita,
+                                        soluzione.probabilita_interna)
+            return [] if tentativo is None else [tentativo]
+        colonne: int = partita.larghezza
+        return ([Mossa(*divmod(idx, colonne), AZIONE_SEGNA) for idx in soluzione.mine] +
+                [Mossa(*divmod(idx, colonne), AZIONE_SCOPRI) for idx in soluzione.sicure])
+
+    def _tentativo(self, partita: Partita, probabilita: Dict[int, float],
+                   probabilita_interna: float) -> Optional[Mossa]:
+        t = partita.tabellone
+        migliore: Optional[int] = min(probabilita, key=probabilita.__getitem__, default=None)
+        if migliore is None or probabilita[migliore] > probabilita_interna:
+            # Casella interna a caso: si campiona invece di elencarle tutte
+            celle: int = t.righe * t.colonne
+            if len(t.scoperte) + len(t.segnate) + len(probabilita) < celle:
+                while True:
+                    idx: int = self._rng.randrange(celle)
+                    if (idx not in t.scoperte and idx not in t.segnate
+                            and idx not in probabilita):
+                        migliore = idx
+                        break
+        if migliore is None:
+            return None
+        return Mossa(*divmod(migliore, partita.larghezza), AZIONE_SCOPRI)
+
+
+# Nome -> costruttore della politica; una politica restituisce il prossimo blocco di
+# mosse (vedi Partita.applica_mosse), vuoto se non ha più mosse da proporre.
+POLITICHE: Dict[str, Callable[[Partita, random.Random], Politica]] = {
+    "casuale": PoliticaCasuale,
+    "risolutore": PoliticaRisolutore,
+}
+
+
+class Statistiche:
+    """Totali aggregabili di un insieme di partite simulate."""
+
+    def __init__(self) -> None:
+        self.partite: int = 0
+        self.vittorie: int = 0
+        self.mosse: int = 0
+        self.caselle_scoperte: int = 0
+        self.secondi: float = 0.0
+
+    def unisci(self, parziale: Dict[str, int]) -> None:
+        self.partite += parziale["partite"]
+        self.vittorie += parziale["vittorie"]
+        self.mosse += parziale["mosse"]
+        self.caselle_scoperte += parziale["caselle_scoperte"]
+
+    def come_dict(self) -> Dict[str, float]:
+        partite: int = max(self.partite, 1)
+        return {
+            "partite": self.partite,
+            "percentuale_vittorie": self.vittorie / partite,
+            "mosse_per_partita": self.mosse / partite,
+            "scoperte_per_partita": self.caselle_scoperte / partite,
+            "partite_al_secondo": self.partite / self.secondi if self.secondi else 0.0,
+        }
+
+
+def gioca_partita(larghezza: int, altezza: int, n_mine: int, seme: int,
+                  politica: str, compatto: bool = False) -> Tuple[bool, int, int]:
+    """Gioca una partita fino alla fine; restituisce (vittoria, mosse, caselle scoperte)."""
+    partita = Partita(larghezza, altezza, n_mine, compatto=compatto, seme=seme)
+    # Generatore distinto per la politica, altrimenti ripeterebbe la sequenza delle mine
+    giocatore = POLITICHE[politica](partita, random.Random(f"politica:{seme}"))
+    mosse: int = 0
+    while partita.stato_corrente == 0:
+        lotto: List[Mossa] = giocatore.prossime_mosse(partita)
+        if not lotto:
+            break
+        partita.applica_mosse(lotto)
+        mosse += len(lotto)
+    return partita.stato_corrente == 1, mosse, len(partita.tabellone.scoperte)
+
+
+def _simula_blocco(larghezza: int, altezza: int, n_mine: int, inizio: int, fine: int,
+                   politica: str, compatto: bool) -> Dict[str, int]:
+    parziale: Dict[str, int] = {"partite": 0, "vittorie": 0, "mosse": 0, "caselle_scoperte": 0}
+    for seme in range(inizio, fine):
+        vittoria, mosse, scoperte = gioca_partita(larghezza, altezza, n_mine, seme,
+                                                  politica, compatto)
+        parziale["partite"] += 1
+        parziale["vittorie"] += vittoria
+        parziale["mosse"] += mosse
+        parziale["caselle_scoperte"] += scoperte
+    return parziale
+
+
+def esegui(larghezza: int, altezza: int, n_mine: int, semi: range, politica: str = "casuale",
+           processi: Optional[int] = None, blocco: Optional[int] = None,
+           compatto: bool = False) -> Iterator[Statistiche]:
+    """
+    Simula una partita per ogni seme in `semi` su un pool di processi e restituisce le
+    statistiche cumulative dopo ogni blocco completato (l'ultima è il totale).
+    """
+    if politica not in POLITICHE:
+        raise ValueError(f"Politica sconosciuta: {politica}")
+    processi = processi or os.cpu_count() or 1
+    # Blocchi abbastanza piccoli da bilanciare il carico, abbastanza grandi da
+    # ammortizzare il costo di invio dei compiti ai processi
+    blocco = blocco or max(1, min(1000, len(semi) // (processi * 8)))
+    statistiche = Statistiche()
+    inizio_tempo: float = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processi) as pool:
+        compiti = [pool.submit(_simula_blocco, larghezza, altezza, n_mine,
+                               semi[i], semi[min(i + blocco, len(semi)) - 1] + 1,
+                               politica, compatto)
+                   for i in range(0, len(semi), blocco)]
+        for compito in as_completed(compiti):
+            statistiche.unisci(compito.result())
+            statistiche.secondi = time.perf_counter() - inizio_tempo
+            yield statistiche
+
+
+def _intervallo_semi(testo: str) -> range:
+    inizio, _, fine = testo.partition(":")
+    return range(int(inizio), int(fine)) if fine else range(int(inizio))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Simulazione di massa di partite a campo minato")
+    parser.add_argument("--larghezza", type=int, default=9)
+    parser.add_argument("--altezza", type=int, default=9)
+    gruppo = parser.add_mutually_exclusive_group()
+    gruppo.add_argument("--mine", type=int, help="numero di mine")
+    gruppo.add_argument("--densita", type=float, default=0.125, help="frazione di caselle minate")
+    parser.add_argument("--semi", type=_intervallo_semi, default=range(1000),
+                        help="intervallo di semi, es. 0:10000 (una partita per seme)")
+    parser.add_argument("--politica", choices=sorted(POLITICHE), default="casuale")
+    parser.add_argument("--processi", type=int, default=None)
+    parser.add_argument("--blocco", type=int, default=None, help="partite per compito")
+    parser.add_argument("--compatto", action="store_true", help="tabellone a 1 byte per casella")
+    parser.add_argument("--json", action="store_true", help="una riga JSON per aggiornamento")
+    args = parser.parse_args(argv)
+
+    n_mine: int = (args.mine if args.mine is not None
+                   else round(args.larghezza * args.altezza * args.densita))
+    for statistiche in esegui(args.larghezza, args.altezza, n_mine, args.semi, args.politica,
+                              args.processi, args.blocco, args.compatto):
+        dati = statistiche.come_dict()
+        if args.json:
+            print(json.dumps(dati), flush=True)
+        else:
+            print(f"partite={dati['partite']} vittorie={dati['percentuale_vittorie']:.2%} "
+                  f"mosse/partita={dati['mosse_per_partita']:.1f} "
+                  f"scoperte/partita={dati['scoperte_per_partita']:.1f} "
+                  f"partite/s={dati['partite_al_secondo']:.0f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
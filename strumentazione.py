@@ -0,0 +1,90 @@
+"""
+Strumentazione opzionale dei percorsi critici di Partita e Tabellone.
+
+Si attiva con Partita.attiva_strumentazione(); finché non è attiva, Partita e Tabellone
+pagano solo il controllo `strumentazione is not None`. Ogni operazione misurata
+("scopri", "segna", "evoluzione", "annulla", "ripeti", "render", "scopri_regione")
+registra la durata in un istogramma a intervalli di potenze di 2 nanosecondi; i
+contatori ("celle_scoperte", "byte_evoluzione", "checkpoint", ...) sommano quantità.
+Tutto si esporta con come_dict() o come_json().
+"""
+from typing import Any, Dict, List
+import json
+import time
+
+_INTERVALLI: int = 64  # 2**63 ns bastano per qualsiasi durata
+
+
+class Istogramma:
+    """Durate di un'operazione: l'intervallo i conta le durate d con 2**(i-1) <= d < 2**i ns."""
+
+    def __init__(self) -> None:
+        self.conteggio: int = 0
+        self.totale_ns: int = 0
+        self.massimo_ns: int = 0
+        self.intervalli: List[int] = [0] * _INTERVALLI
+
+    def registra(self, durata_ns: int) -> None:
+        self.conteggio += 1
+        self.totale_ns += durata_ns
+        if durata_ns > self.massimo_ns:
+            self.massimo_ns = durata_ns
+        self.intervalli[min(durata_ns.bit_length(), _INTERVALLI - 1)] += 1
+
+    def quantile(self, q: float) -> int:
+        """Limite superiore (in ns) dell'intervallo che contiene il quantile q."""
+        soglia: float = q * self.conteggio
+        cumulato: int = 0
+        for i, n in enumerate(self.intervalli):
+            cumulato += n
+            if n and cumulato >= soglia:
+                return min(1 << i, self.massimo_ns)
+        return self.massimo_ns
+
+    def come_dict(self) -> Dict[str, Any]:
+        return {
+            "conteggio": self.conteggio,
+            "totale_ms": self.totale_ns / 1e6,
+            "media_us": self.totale_ns / self.conteggio / 1e3 if self.conteggio else 0.0,
+            "p50_us": self.quantile(0.5) / 1e3,
+            "p99_us": self.quantile(0.99) / 1e3,
+            "massimo_us": self.massimo_ns / 1e3,
+            # solo gli intervalli non vuoti, indicizzati dal loro limite superiore in ns
+            "istogramma_ns": {1 << i: n for i, n in enumerate(self.intervalli) if n},
+        }
+
+
+class Strumentazione:
+    """Contatori e istogrammi delle latenze, condivisi da una partita e dai suoi tabelloni."""
+
+    def __init__(self) -> None:
+        self.contatori: Dict[str, int] = {}
+        self.latenze: Dict[str, Istogramma] = {}
+
+    @staticmethod
+    def inizio() -> int:
+        return time.perf_counter_ns()
+
+    def registra(self, operazione: str, inizio: int) -> None:
+        """Registra la durata di `operazione`, iniziata all'istante `inizio` (vedi inizio)."""
+        durata: int = time.perf_counter_ns() - inizio
+        istogramma = self.latenze.get(operazione)
+        if istogramma is None:
+            istogramma = self.latenze[operazione] = Istogramma()
+        istogramma.registra(durata)
+
+    def conta(self, contatore: str, n: int = 1) -> None:
+        self.contatori[contatore] = self.contatori.get(contatore, 0) + n
+
+    def azzera(self) -> None:
+        self.contatori = {}
+        self.latenze = {}
+
+    def come_dict(self) -> Dict[str, Any]:
+        return {
+            "contatori": dict(self.contatori),
+            "latenze": {nome: ist.come_dict() for nome, ist in self.latenze.items()},
+        }
+
+    def come_json(self, **opzioni: Any) -> str:
+        return json.dumps(self.come_dict(), **opzioni)
@@ -0,0 +1,62 @@
+import random
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pytest
+
+from blocchi import PartitaABlocchi, TabelloneABlocchi
+from campo_minato import Partita
+
+
+def _coppia(larghezza: int, altezza: int, n_mine: int, seme: int, lato_blocco: int,
+            max_blocchi: int, percorso: Optional[str] = None) -> Tuple[PartitaABlocchi, Partita]:
+    """Partita a blocchi e Partita compatta con le stesse mine, dopo lo stesso primo click."""
+    b = PartitaABlocchi(larghezza, altezza, n_mine, seme=seme, lato_blocco=lato_blocco,
+                        max_blocchi=max_blocchi, percorso_appoggio=percorso)
+    b.scopriCasella(altezza // 2, larghezza // 2)
+    p = Partita(larghezza, altezza, n_mine, compatto=True, disposizione=sorted(b.tabellone.mine))
+    p.scopriCasella(altezza // 2, larghezza // 2)
+    return b, p
+
+
+@pytest.mark.parametrize("seme, lato_blocco, max_blocchi", [(1, 4, 2), (2, 7, 3), (3, 64, 1), (4, 5, 50)])
+def test_uguale_a_tabellone(seme: int, lato_blocco: int, max_blocchi: int) -> None:
+    b, p = _coppia(37, 29, 60, seme, lato_blocco, max_blocchi)
+    tb, tp = b.tabellone, p.tabellone
+    celle = range(37 * 29)
+    assert [tb.mine_adiacenti_cache[i] for i in celle] == [tp.mine_adiacenti_cache[i] for i in celle]
+    rng = random.Random(seme)
+    while p.stato_corrente == 0:
+        assert set(tb.scoperte) == set(tp.scoperte) and len(tb.scoperte) == len(tp.scoperte)
+        assert set(tb.segnate) == set(tp.segnate) and len(tb.segnate) == len(tp.segnate)
+        assert str(tb) == str(tp)
+        impronte = tb.fingerprint(), tp.fingerprint()
+        coperte = [i for i in celle if i not in tp.scoperte and i not in tp.segnate]
+        r, c = divmod(rng.choice(coperte), 37)
+        if rng.random() < 0.2:
+            b.segna_casella(r, c)
+            p.segna_casella(r, c)
+        else:
+            b.scopriCasella(r, c)
+            p.scopriCasella(r, c)
+        # Le impronte differiscono per le mine, ma cambiano allo stesso modo
+        assert tb.fingerprint() ^ impronte[0] == tp.fingerprint() ^ impronte[1]
+    assert b.stato_corrente == p.stato_corrente
+
+
+def test_blocchi_scaricati_e_riletti(tmp_path: Path) -> None:
+    percorso = tmp_path / "appoggio.bin"
+    b, p = _coppia(120, 90, 400, 5, 8, 2, str(percorso))
+    assert percorso.stat().st_size > 0  # la regione scoperta non sta in due blocchi
+    rng = random.Random(5)
+    for _ in range(50):
+        coperte = [i for i in range(120 * 90) if i not in p.tabellone.scoperte]
+        r, c = divmod(rng.choice(coperte), 120)
+        b.segna_casella(r, c)
+        p.segna_casella(r, c)
+    copia = TabelloneABlocchi.copia_tabellone(b.tabellone)
+    # str rilegge tutti i blocchi dal file o dal seme, due alla volta
+    assert str(b.tabellone) == str(p.tabellone) == str(copia)
+    assert copia == b.tabellone and set(copia.segnate) == set(p.tabellone.segnate)
+    b.muovi_mossa("indietro")
+    assert copia != b.tabellone
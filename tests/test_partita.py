@@ -0,0 +1,12 @@
+from campo_minato import Partita
+
+
+def test_celle_modificate_solo_con_un_consumatore() -> None:
+    p = Partita(9, 9, 10, seme=0)
+    p.scopriCasella(4, 4)
+    assert p._celle_modificate is None  # nessuno le preleva: niente da conservare
+    assert p.preleva_celle_modificate() == set()
+    p.segna_casella(*divmod(min(p.tabellone.mine), 9))
+    p.muovi_mossa("indietro")
+    assert p.preleva_celle_modificate() == {min(p.tabellone.mine)}
+    assert p.preleva_celle_modificate() == set()
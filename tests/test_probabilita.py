@@ -0,0 +1,103 @@
+from itertools import combinations
+from typing import Dict, Iterator
+import random
+
+import pytest
+
+from campo_minato import Partita, Tabellone
+from probabilita import MotoreProbabilita, calcola, enumera_firma, firma, _unisci
+from test_risolutore import _POSIZIONE_3026
+
+
+def _bruta(t: Tabellone, n_mine: int) -> Dict[int, float]:
+    """Probabilità contando tutte le disposizioni compatibili con lo stato visibile."""
+    scoperte = set(t.scoperte)
+    segnate = set(t.segnate)
+    libere = [i for i in range(t.righe * t.colonne) if i not in scoperte and i not in segnate]
+    minate = {i: 0 for i in libere}
+    totale = 0
+    for disposizione in combinations(libere, n_mine - len(segnate)):
+        mine = set(disposizione) | segnate
+        if all(sum(j in mine for j in t.vicini(i)) == t.mine_adiacenti_cache[i]
+               for i in scoperte):
+            totale += 1
+            for i in disposizione:
+                minate[i] += 1
+    return {i: n / totale for i, n in minate.items()}
+
+
+def _posizioni(n: int) -> Iterator[Partita]:
+    rng = random.Random(5)
+    while n:
+        larghezza, altezza, n_mine = rng.choice([(5, 4, 5), (6, 4, 6), (5, 5, 7), (4, 4, 3)])
+        p = Partita(larghezza, altezza, n_mine, seme=rng.randrange(10 ** 6))
+        p.scopriCasella(rng.randrange(altezza), rng.randrange(larghezza))
+        t = p.tabellone
+        for _ in range(rng.randrange(3)):
+            sicure = [i for i in range(larghezza * altezza)
+                      if i not in t.mine and i not in t.scoperte]
+            if sicure and p.stato_corrente == 0:
+                p.scopriCasella(*divmod(rng.choice(sicure), larghezza))
+        if p.stato_corrente != 0:
+            continue
+        if rng.random() < 0.4:
+            p.segna_casella(*divmod(rng.choice(sorted(t.mine)), larghezza))
+        n -= 1
+        yield p
+
+
+@pytest.mark.parametrize("processi", [1, 2])
+def test_uguale_al_conteggio_completo(processi: int) -> None:
+    # Soglie basse: con due processi anche le componenti piccole vanno nel pool, divise in rami
+    with MotoreProbabilita(processi, soglia_parallela=1, soglia_rami=3) as motore:
+        for p in _posizioni(30):
+            soluzione = motore.calcola(p.tabellone, p.n_mine)
+            for idx, probabilita in _bruta(p.tabellone, p.n_mine).items():
+                assert soluzione.probabilita_di(idx) == pytest.approx(probabilita, abs=1e-12)
+
+
+def test_rami_uniti_uguali_alla_componente() -> None:
+    # Striscia di 30 caselle, un vincolo "1 mina" per ogni finestra di tre
+    componente = [(frozenset(range(max(0, i - 1), min(30, i + 2))), 1) for i in range(30)]
+    vincoli, _ = firma(componente)
+    motore = MotoreProbabilita(processi=4, soglia_rami=10)
+    rami = motore._rami(vincoli)
+    assert len(rami) == 16
+    assert _unisci([enumera_firma(vincoli, fissate) for fissate in rami]) == enumera_firma(vincoli)
+
+
+def test_cache_per_firma() -> None:
+    motore = MotoreProbabilita(processi=1)
+    p = Partita(16, 16, 40, seme=3026)
+    p.scopriCasella(8, 8)
+    prima = motore.calcola(p.tabellone, 40)
+    n_enumerate = motore.componenti_enumerate
+    assert n_enumerate > 0
+    seconda = motore.calcola(p.tabellone, 40)
+    assert motore.componenti_enumerate == n_enumerate
+    assert motore.componenti_dalla_cache >= n_enumerate
+    assert seconda.probabilita == prima.probabilita
+
+
+def test_contrassegno_sbagliato() -> None:
+    p = Partita(16, 16, 40, seme=3026)
+    p.scopriCasella(8, 8)
+    for r, riga in enumerate(_POSIZIONE_3026.splitlines()):
+        for c, carattere in enumerate(riga):
+            if carattere.isdigit() and p.tabellone.is_coperta(r, c):
+                p.tabellone.scopri_casella(r, c)
+    p.segna_casella(13, 2)  # non è una mina
+    with pytest.raises(ValueError):
+        calcola(p.tabellone, 40)
+
+
+def test_troppe_mine_segnate() -> None:
+    p = Partita(5, 5, 2, seme=0)
+    p.scopriCasella(0, 0)
+    t = p.tabellone
+    coperte = [i for i in range(25) if i not in t.scoperte]
+    assert len(coperte) > 2
+    for i in coperte[:3]:
+        t.segna_casella(*divmod(i, 5))
+    with pytest.raises(ValueError):
+        calcola(t, 2)
@@ -0,0 +1,36 @@
+import shutil
+from pathlib import Path
+
+from campo_minato import Partita
+from registrazione import LettoreRegistrazioni, ScrittoreRegistrazioni
+
+
+def test_scrittore_non_chiuso(tmp_path: Path) -> None:
+    percorso = str(tmp_path / "partite.cmr")
+    interrotto = str(tmp_path / "interrotto.cmr")
+    p = Partita(9, 9, 10, seme=7)
+    scrittore = ScrittoreRegistrazioni(percorso)
+    scrittore.segui(p)
+    p.scopriCasella(4, 4)
+    p.segna_casella(*divmod(min(p.tabellone.mine), 9))
+    scrittore.flush()
+    # Il file come resterebbe se il processo terminasse ora, più un record a metà
+    shutil.copy(percorso, interrotto)
+    with open(interrotto, "ab") as f:
+        f.write(b"\x01\x00\x00")
+    scrittore.chiudi()
+
+    with LettoreRegistrazioni(interrotto) as lettore:
+        registrazioni = list(lettore)
+        assert [r.n_mosse for r in registrazioni] == [2]
+        assert registrazioni[0].partita().tabellone == p.tabellone
+
+    q = Partita(9, 9, 10, seme=8)
+    with ScrittoreRegistrazioni(interrotto) as scrittore:
+        scrittore.segui(q)
+        q.scopriCasella(0, 0)
+    with LettoreRegistrazioni(interrotto) as lettore:
+        registrazioni = list(lettore)
+        assert [(r.seme, r.n_mosse, r.aperta) for r in registrazioni] == [(7, 2, False), (8, 1, False)]
+        assert registrazioni[0].partita().tabellone == p.tabellone
+        assert registrazioni[1].partita().tabellone == q.tabellone
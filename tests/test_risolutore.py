@@ -0,0 +1,56 @@
+import pytest
+
+from campo_minato import Partita
+from risolutore import Risolutore, propaga
+
+# Posizione di Partita(16, 16, 40, seme=3026) dopo il primo click in (8, 8): le cifre
+# sono le caselle scoperte
+_POSIZIONE_3026 = """\
+CCCCCCCCCCXXCCXC
+CCCCCCCXCCCCCXCC
+CCCXCCCCXCCXC3XC
+CCCCCCX21112X211
+CCCCCC3201121100
+CXCCCXX201X10111
+CCCCX4X2011101X1
+CCCX221100000122
+CCCCC1000000001X
+CCCCX10000111022
+CCCC2211001X223X
+CCCXC2X100112XX2
+CC2CX33221101332
+CXC23X2X2X1013X2
+CCCX212232112XX2
+XCXC1001XCCCXCCC"""
+
+
+def test_propaga_vincoli_incoerenti_termina() -> None:
+    vincoli = [(frozenset({1, 2, 3}), 1), (frozenset({1, 2, 3, 4, 5}), 4)]
+    sicure, mine, residui = propaga(vincoli)
+    assert not sicure and not mine
+    with pytest.raises(ValueError):
+        propaga(vincoli, rigoroso=True)
+
+
+def test_contrassegno_sbagliato() -> None:
+    p = Partita(16, 16, 40, seme=3026)
+    p.scopriCasella(8, 8)
+    for r, riga in enumerate(_POSIZIONE_3026.splitlines()):
+        for c, carattere in enumerate(riga):
+            if carattere.isdigit() and p.tabellone.is_coperta(r, c):
+                p.tabellone.scopri_casella(r, c)
+    assert str(p.tabellone) == _POSIZIONE_3026
+    p.segna_casella(13, 2)  # non è una mina
+    soluzione = Risolutore(p.tabellone, 40).risolvi()
+    assert 13 * 16 + 2 not in soluzione.sicure | soluzione.mine
+
+
+def test_probabilita_interna_con_mine_dedotte() -> None:
+    p = Partita(9, 9, 10, seme=0)
+    p.scopriCasella(4, 4)
+    soluzione = Risolutore(p.tabellone, 10).risolvi()
+    t = p.tabellone
+    interne = (81 - len(t.scoperte) - len(soluzione.sicure) - len(soluzione.mine)
+               - len(soluzione.probabilita))
+    assert (len(soluzione.mine), interne) == (8, 8)
+    assert soluzione.probabilita_interna == pytest.approx(0.25)
@@ -0,0 +1,7 @@
+from risolvibili import genera
+
+
+def test_scarta_tabellone_che_richiede_un_tentativo() -> None:
+    # Le deduzioni locali si fermano con la frontiera incerta e qualche mina interna:
+    # la probabilità interna stimata dal Risolutore è 0 ma quella esatta no
+    assert genera(8, 8, 12, 323) is None
@@ -0,0 +1,103 @@
+import random
+from typing import Any, List
+
+import pytest
+
+from campo_minato import AZIONE_SCOPRI, AZIONE_SEGNA, Mossa, Partita, PoliticaStoria, Tabellone
+
+
+@pytest.mark.parametrize("compatto", [False, True])
+def test_checkpoint_limitati_in_partita_lunga(compatto: bool) -> None:
+    # Tante mosse piccole su un tabellone grande: un checkpoint ogni intervallo_checkpoint
+    # mosse peserebbe centinaia di volte le differenze
+    p = Partita(200, 200, 400, compatto=compatto, seme=1)
+    p.scopriCasella(100, 100)
+    rng = random.Random(1)
+    coperte = [divmod(i, 200) for i in range(200 * 200) if i not in p.tabellone.scoperte]
+    for _ in range(3000):
+        p.segna_casella(*rng.choice(coperte))
+    memoria = p.memoria()
+    # Ogni checkpoint dopo il primo è pagato da differenze e mosse almeno altrettanto grandi
+    assert memoria["checkpoint"] <= memoria["tabellone"] + memoria["differenze"] + memoria["mosse"]
+    assert p.tabellone == p.evoluzione[-1]
+
+
+def test_vista_mosse() -> None:
+    p = Partita(9, 9, 10, seme=0)
+    mosse = p.mosse  # la vista segue la partita
+    p.scopriCasella(4, 4)
+    coperte = [divmod(i, 9) for i in range(81) if i not in p.tabellone.scoperte]
+    for r, c in coperte[:6]:
+        p.segna_casella(r, c)
+    attese = [Mossa(4, 4, AZIONE_SCOPRI)] + [Mossa(r, c, AZIONE_SEGNA) for r, c in coperte[:6]]
+    assert dict(mosse) == dict(enumerate(attese))
+    assert len(mosse) == 7 and mosse[6] == attese[6] and 7 not in mosse
+
+
+def _gioca(p: Partita, n: int, seme: int = 0) -> None:
+    """n mosse casuali ma ripetibili: stessa partita e stesso seme, stesse mosse."""
+    rng = random.Random(seme)
+    p.scopriCasella(p.altezza // 2, p.larghezza // 2)
+    t = p.tabellone
+    for _ in range(n - 1):
+        coperte = [i for i in range(p.larghezza * p.altezza) if i not in t.scoperte]
+        sicure = [i for i in coperte if i not in t.mine and i not in t.segnate]
+        if len(sicure) > 1 and rng.random() < 0.2:
+            p.scopriCasella(*divmod(rng.choice(sicure), p.larghezza))
+        else:
+            p.segna_casella(*divmod(rng.choice(coperte), p.larghezza))
+
+
+def _annulla_tutto(p: Partita) -> List[Tabellone]:
+    """Annulla finché possibile; restituisce i tabelloni attraversati, dall'ultimo."""
+    messaggi: List[str] = []
+
+    def osservatore(evento: str, dati: Any) -> None:
+        if evento == "messaggio":
+            messaggi.append(dati)
+
+    p.aggiungi_osservatore(osservatore)
+    tabelloni = [Tabellone.copia_tabellone(p.tabellone)]
+    while True:
+        p.muovi_mossa("indietro")
+        if messaggi:
+            return tabelloni
+        tabelloni.append(Tabellone.copia_tabellone(p.tabellone))
+
+
+@pytest.mark.parametrize("massimo", [0, 1, 5])
+def test_max_annullamenti(massimo: int) -> None:
+    riferimento = Partita(16, 16, 40, seme=3)
+    _gioca(riferimento, 30)
+    p = Partita(16, 16, 40, seme=3, politica_storia=PoliticaStoria(max_annullamenti=massimo))
+    _gioca(p, 30)
+    assert _annulla_tutto(p) == _annulla_tutto(riferimento)[:massimo + 1]
+
+
+@pytest.mark.parametrize("compatto", [False, True])
+def test_differenze_scartate_e_rigiocate(compatto: bool) -> None:
+    riferimento = Partita(16, 16, 40, compatto=compatto, seme=3)
+    _gioca(riferimento, 200)
+    memoria = riferimento.memoria()
+    # Abbastanza per checkpoint e mosse ma non per tutte le differenze
+    limite = memoria["checkpoint"] + memoria["mosse"] + memoria["differenze"] // 2
+    p = Partita(16, 16, 40, compatto=compatto, seme=3,
+                politica_storia=PoliticaStoria(memoria_massima=limite))
+    _gioca(p, 200)
+    assert p.memoria()["differenze"] < memoria["differenze"]
+    tabelloni = _annulla_tutto(p)
+    assert len(tabelloni) == 201
+    assert tabelloni == _annulla_tutto(riferimento)
+    for tabellone in reversed(tabelloni):
+        assert p.tabellone == tabellone
+        p.muovi_mossa("avanti")
+
+
+def test_memoria_minima_non_copia_a_ogni_mossa() -> None:
+    p = Partita(16, 16, 40, seme=3, politica_storia=PoliticaStoria(memoria_massima=1))
+    strumentazione = p.attiva_strumentazione()
+    _gioca(p, 300)
+    assert strumentazione.contatori.get("checkpoint", 0) <= 300 // 10
+    memoria = p.memoria()
+    # Un solo checkpoint, più differenze e mosse che pesano meno di un'altra copia
+    assert memoria["checkpoint"] + memoria["differenze"] + memoria["mosse"] <= 3 * memoria["checkpoint"]